@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Cold-start benchmark for `crawl.py` subcommands.
+
+Each case is run in a fresh interpreter several times; the median wall time
+is reported together with the heavy dependencies that got imported, so a
+regression that pulls pandas/requests/bs4 into a light path shows up at once.
+Only offline invocations are measured: `--help`, `symbols --from-file`, and
+real runs of the offline subcommands against an empty temporary directory
+(these need pandas, but should never load requests or bs4).
+
+Usage:
+    python benchmarks/startup.py [--runs 10]
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parent.parent
+HEAVY_MODULES = ("pandas", "requests", "bs4")
+
+
+def cases(empty: str) -> list:
+    """Offline invocations; `empty` is an empty directory used for all data paths."""
+    return [
+        ["--help"],
+        ["symbols", "--from-file", str(ROOT / "symbols.txt")],
+        ["query", "--outdir", empty],
+        ["screen", "--outdir", empty],
+        ["check", "--outdir", empty],
+        ["features", "--outdir", empty],
+        ["reparse", "--archive-dir", empty],
+    ]
+
+
+def _heavy_imports(argv) -> list:
+    """Return the heavy top-level modules imported while running `argv`."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", str(ROOT / "crawl.py")] + argv,
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    loaded = set()
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        name = line.rsplit("|", 1)[-1].strip()
+        if name in HEAVY_MODULES:
+            loaded.add(name)
+    return sorted(loaded)
+
+
+def time_case(argv, runs: int) -> float:
+    """Median wall time in milliseconds over `runs` cold starts."""
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, str(ROOT / "crawl.py")] + argv,
+            cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    p = argparse.ArgumentParser(description="Measure crawl.py cold-start time per subcommand")
+    p.add_argument("--runs", type=int, default=10, help="Cold starts per case")
+    args = p.parse_args()
+
+    samples = []
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"])
+        samples.append((time.perf_counter() - start) * 1000)
+
+    print(f"interpreter baseline (python -c pass): {statistics.median(samples):.0f} ms")
+    print(f"{'case':45} {'median ms':>10}  heavy imports")
+    with tempfile.TemporaryDirectory() as empty:
+        for argv in cases(empty):
+            label = " ".join(
+                "symbols.txt" if a.endswith("symbols.txt") else "<empty>" if a == empty else a
+                for a in argv
+            )
+            ms = time_case(argv, args.runs)
+            heavy = ", ".join(_heavy_imports(argv)) or "-"
+            print(f"{label:45} {ms:10.0f}  {heavy}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,13 +5,19 @@ Usage examples are in the project README. This script supports subcommands:
 - `symbols` to fetch or load symbol lists
 - `historical` to fetch historical OHLC for one or more symbols (uses cafef API by default)
 - `fundamental` to fetch fundamental data (P/E, ROE, EPS, etc.) from TCBS API
-- `realtime` to poll symbols and append realtime rows
+- `realtime` to poll symbols, appending realtime rows and intraday bars (`--indices` polls all indices, storing deltas)
+- `features` to update technical features from stored OHLC (also run after `historical`)
+- `query` to read stored OHLC for symbol sets, date ranges and columns (predicate pushdown)
+- `screen` to filter/sort the latest ratios of all stored symbols locally
+- `check` to scan stored OHLC for gaps and anomalies (and optionally refetch only broken windows)
+- `reparse` to rebuild stored datasets from the raw-response archive (offline)
 
+Heavy dependencies (pandas, requests, BeautifulSoup) are imported inside the
+subcommand handlers that need them, so `--help` and light subcommands start fast.
 """
 import argparse
 from crawler import symbols as symbols_mod
-from crawler.historical import fetch_historical
-from crawler.fundamental import save_fundamental_csv, get_latest_ratios
+from crawler import archive
 import sys
 
 
@@ -30,7 +36,13 @@ def cmd_symbols(args):
         print("Provide --from-file PATH or --from-url URL")
 
 
+def _configure_archive(args):
+    archive.set_archive_dir(None if args.no_archive else args.archive_dir)
+
+
 def cmd_historical(args):
+    from crawler.historical import fetch_historical
+    _configure_archive(args)
     if not args.symbol and not args.symbols_file:
         print("Provide --symbol SYMBOL or --symbols-file FILE")
         sys.exit(1)
@@ -49,9 +61,15 @@ def cmd_historical(args):
                 print(f"No historical data found for {s}")
         except Exception as e:
             print(f"Error fetching historical for {s}: {e}")
+    if not args.no_features:
+        from crawler.features import update_features
+        updated = update_features(syms, data_dir=args.outdir)
+        print(f"Updated features for {sum(1 for n in updated.values() if n)} symbols")
 
 
 def cmd_fundamental(args):
+    from crawler.fundamental import save_fundamental_csv, get_latest_ratios
+    _configure_archive(args)
     if not args.symbol and not args.symbols_file:
         print("Provide --symbol SYMBOL or --symbols-file FILE")
         sys.exit(1)
@@ -85,6 +103,166 @@ def cmd_fundamental(args):
         except Exception as e:
             print(f"Error fetching fundamental for {s}: {e}")
 
+
+def cmd_realtime(args):
+    _configure_archive(args)
+    if not args.indices and not args.symbol and not args.symbols_file:
+        print("Provide --indices, --symbol SYMBOL or --symbols-file FILE")
+        sys.exit(1)
+    from crawler import realtime
+    from crawler.bars import parse_interval
+    try:
+        if args.indices:
+            realtime.poll_indices(
+                interval=args.interval,
+                out_dir=args.outdir,
+                max_ticks=args.max_ticks,
+                keyframe_every=args.keyframe_every,
+            )
+        else:
+            syms = []
+            if args.symbol:
+                syms.append(args.symbol)
+            if args.symbols_file:
+                syms.extend(symbols_mod.load_symbols_from_file(args.symbols_file))
+            realtime.poll_symbols(
+                syms,
+                interval=args.interval,
+                out_dir=args.outdir,
+                bar_intervals=[parse_interval(b) for b in args.bars.split(",") if b.strip()],
+                max_ticks=args.max_ticks,
+            )
+    except KeyboardInterrupt:
+        pass
+
+
+def cmd_features(args):
+    from crawler.features import update_features
+    syms = None
+    if args.symbol or args.symbols_file:
+        syms = []
+        if args.symbol:
+            syms.append(args.symbol)
+        if args.symbols_file:
+            syms.extend(symbols_mod.load_symbols_from_file(args.symbols_file))
+    updated = update_features(syms, data_dir=args.outdir, full=args.full)
+    for s, n in updated.items():
+        if n:
+            print(f"{s}: {n} feature rows written")
+    print(f"Updated features for {sum(1 for n in updated.values() if n)} of {len(updated)} symbols")
+
+
+def cmd_query(args):
+    from crawler import query
+    syms = None
+    if args.symbols or args.symbols_file:
+        syms = [s.strip() for s in (args.symbols or "").split(",") if s.strip()]
+        if args.symbols_file:
+            syms.extend(symbols_mod.load_symbols_from_file(args.symbols_file))
+    start = query.last_days_start(args.last_days) if args.last_days else args.start
+    columns = [c.strip() for c in args.columns.split(",") if c.strip()] if args.columns else None
+    frames = query.query(syms, start=start, end=args.end, columns=columns, data_dir=args.outdir)
+    try:
+        rows = query.write_results(frames, fmt=args.format, output=args.output)
+    except ImportError as e:
+        print(e)
+        sys.exit(1)
+    if args.output:
+        print(f"Wrote {rows} rows -> {args.output}")
+
+
+def cmd_screen(args):
+    from crawler import screener
+    columns = [c.strip() for c in args.columns.split(",") if c.strip()] if args.columns else None
+    try:
+        df = screener.screen(
+            args.expr,
+            sort=args.sort,
+            limit=args.limit,
+            columns=columns,
+            fundamental_dir=args.outdir,
+            refresh=not args.no_refresh,
+        )
+    except Exception as e:
+        print(f"Invalid screen: {e}")
+        sys.exit(1)
+    if df.empty:
+        print("No symbols matched")
+        return
+    if args.output:
+        df.to_csv(args.output, index=False)
+        print(f"Saved {len(df)} symbols -> {args.output}")
+    else:
+        print(df.to_string(index=False))
+
+
+def cmd_check(args):
+    _configure_archive(args)
+    from crawler import quality
+    syms = None
+    if args.symbol or args.symbols_file:
+        syms = []
+        if args.symbol:
+            syms.append(args.symbol)
+        if args.symbols_file:
+            syms.extend(symbols_mod.load_symbols_from_file(args.symbols_file))
+    holidays = symbols_mod.load_symbols_from_file(args.holidays_file) if args.holidays_file else None
+    issues = quality.scan(args.outdir, symbols=syms, holidays=holidays, min_coverage=args.min_coverage)
+    if issues.empty:
+        print("No issues found")
+        return
+    summary = issues.groupby("kind")["symbol"].agg(["count", "nunique"])
+    for kind, row in summary.iterrows():
+        print(f"{kind}: {row['count']} issues in {row['nunique']} symbols")
+    if args.report:
+        issues.to_csv(args.report, index=False)
+        print(f"Saved report -> {args.report}")
+    if args.repair:
+        repaired = []
+        for r in quality.backfill(issues, data_dir=args.outdir):
+            print(f"Refetched {r['symbol']} {r['start']:%Y-%m-%d}..{r['end']:%Y-%m-%d}: {r['rows']} rows")
+            if r["rows"] and r["symbol"] not in repaired:
+                repaired.append(r["symbol"])
+        if repaired and not args.no_features:
+            from crawler.features import update_features
+            updated = update_features(repaired, data_dir=args.outdir)
+            print(f"Updated features for {sum(1 for n in updated.values() if n)} symbols")
+
+
+def cmd_reparse(args):
+    from crawler.reparse import reparse
+    syms = None
+    if args.symbol or args.symbols_file:
+        syms = []
+        if args.symbol:
+            syms.append(args.symbol)
+        if args.symbols_file:
+            syms.extend(symbols_mod.load_symbols_from_file(args.symbols_file))
+    results = reparse(
+        root=args.archive_dir,
+        historical_out=args.historical_outdir,
+        fundamental_out=args.fundamental_outdir,
+        symbols=syms,
+        workers=args.workers,
+    )
+    if not results:
+        print(f"Nothing to reparse in {args.archive_dir}")
+        return
+    for r in results:
+        if r["error"]:
+            print(f"Error reparsing {r['symbol']}: {r['error']}")
+            continue
+        if r["historical"]:
+            print(f"Rebuilt historical for {r['symbol']} -> {r['historical']}")
+        for dtype, path in r["fundamental"].items():
+            print(f"Rebuilt {dtype} for {r['symbol']} -> {path}")
+    rebuilt = [r["symbol"] for r in results if r["historical"]]
+    if rebuilt and not args.no_features:
+        from crawler.features import update_features
+        updated = update_features(rebuilt, data_dir=args.historical_outdir)
+        print(f"Updated features for {sum(1 for n in updated.values() if n)} symbols")
+
+
 def main():
     p = argparse.ArgumentParser(description="VN-Index stock data crawler (cafef.vn + TCBS)")
     sub = p.add_subparsers(dest="cmd")
@@ -99,6 +277,9 @@ def main():
     hp.add_argument("--symbols-file", help="File with symbols, one per line")
     hp.add_argument("--url-template", default=None, help="Optional URL template for HTML fallback (contains {symbol})")
     hp.add_argument("--outdir", default="data/historical", help="Output directory for CSV files")
+    hp.add_argument("--no-features", action="store_true", help="Don't update technical features after fetching")
+    hp.add_argument("--archive-dir", default="data/raw", help="Directory for the raw-response archive")
+    hp.add_argument("--no-archive", action="store_true", help="Don't archive raw responses")
     hp.set_defaults(func=cmd_historical)
 
     fp = sub.add_parser("fundamental", help="Fetch fundamental data (P/E, ROE, EPS, etc.)")
@@ -106,8 +287,75 @@ def main():
     fp.add_argument("--symbols-file", help="File with symbols, one per line")
     fp.add_argument("--outdir", default="data/fundamental", help="Output directory for CSV files")
     fp.add_argument("--latest", action="store_true", help="Only show latest ratios (don't save to CSV)")
+    fp.add_argument("--archive-dir", default="data/raw", help="Directory for the raw-response archive")
+    fp.add_argument("--no-archive", action="store_true", help="Don't archive raw responses")
     fp.set_defaults(func=cmd_fundamental)
 
+    tp = sub.add_parser("realtime", help="Poll realtime data")
+    tp.add_argument("--symbol", help="Single symbol to poll (e.g. VIC, ACV)")
+    tp.add_argument("--symbols-file", help="File with symbols, one per line")
+    tp.add_argument("--bars", default="1m,5m,15m", help="Comma-separated intraday bar sizes built from ticks")
+    tp.add_argument("--indices", action="store_true", help="Poll all indices in one request per tick, storing change-only deltas")
+    tp.add_argument("--interval", type=float, default=5.0, help="Seconds between polls")
+    tp.add_argument("--max-ticks", type=int, default=None, help="Stop after this many polls (default: run until interrupted)")
+    tp.add_argument("--keyframe-every", type=int, default=None, help="Write a full snapshot every N deltas (default: once per file)")
+    tp.add_argument("--outdir", default="data/realtime", help="Output directory for realtime files")
+    tp.add_argument("--archive-dir", default="data/raw", help="Directory for the raw-response archive")
+    tp.add_argument("--no-archive", action="store_true", help="Don't archive raw responses")
+    tp.set_defaults(func=cmd_realtime)
+
+    ep = sub.add_parser("features", help="Update technical features (returns, MAs, volatility, momentum) from stored OHLC")
+    ep.add_argument("--symbol", help="Only update this symbol")
+    ep.add_argument("--symbols-file", help="Only update symbols in this file")
+    ep.add_argument("--outdir", default="data/historical", help="Directory of stored OHLC CSV files (features are written there)")
+    ep.add_argument("--full", action="store_true", help="Recompute full history instead of only new rows")
+    ep.set_defaults(func=cmd_features)
+
+    qp = sub.add_parser("query", help="Query stored OHLC by symbols, date range and columns")
+    qp.add_argument("--symbols", help="Comma-separated symbols (default: all stored)")
+    qp.add_argument("--symbols-file", help="File with symbols, one per line")
+    qp.add_argument("--start", help="First date, YYYY-MM-DD (inclusive)")
+    qp.add_argument("--end", help="Last date, YYYY-MM-DD (inclusive)")
+    qp.add_argument("--last-days", type=int, help="Shortcut for --start N calendar days ago")
+    qp.add_argument("--columns", help="Comma-separated columns to return (default: all)")
+    qp.add_argument("--format", choices=["csv", "json", "parquet"], default="csv", help="Output format")
+    qp.add_argument("--output", help="Output file (default: stdout)")
+    qp.add_argument("--outdir", default="data/historical", help="Directory of stored OHLC CSV files")
+    qp.set_defaults(func=cmd_query)
+
+    sc = sub.add_parser("screen", help="Screen stored fundamentals, e.g. \"P/E < 10 and ROE > 15%%\"")
+    sc.add_argument("expr", nargs="?", help="Filter expression over P/E, P/B, ROE, ROA, EPS, exchange, ...")
+    sc.add_argument("--sort", help="Comma-separated sort columns, '-' prefix for descending (e.g. --sort=-ROE)")
+    sc.add_argument("--limit", type=int, help="Show only the first N symbols")
+    sc.add_argument("--columns", help="Comma-separated columns to show")
+    sc.add_argument("--output", help="Save result to this CSV file")
+    sc.add_argument("--outdir", default="data/fundamental", help="Directory of stored fundamental CSV files")
+    sc.add_argument("--no-refresh", action="store_true", help="Use the snapshot as is, without checking for updated files")
+    sc.set_defaults(func=cmd_screen)
+
+    cp = sub.add_parser("check", help="Scan stored OHLC for gaps and anomalies")
+    cp.add_argument("--symbol", help="Only check this symbol")
+    cp.add_argument("--symbols-file", help="Only check symbols in this file")
+    cp.add_argument("--outdir", default="data/historical", help="Directory of stored OHLC CSV files")
+    cp.add_argument("--holidays-file", help="File with holiday dates (YYYY-MM-DD), one per line; default infers the calendar from the data")
+    cp.add_argument("--min-coverage", type=float, default=0.5, help="Share of listed symbols that must trade for an inferred trading day")
+    cp.add_argument("--report", help="Write all issues to this CSV file")
+    cp.add_argument("--repair", action="store_true", help="Refetch only the broken date windows from cafef API")
+    cp.add_argument("--no-features", action="store_true", help="Don't update technical features after repairing")
+    cp.add_argument("--archive-dir", default="data/raw", help="Directory for the raw-response archive (with --repair)")
+    cp.add_argument("--no-archive", action="store_true", help="Don't archive raw responses (with --repair)")
+    cp.set_defaults(func=cmd_check)
+
+    rp = sub.add_parser("reparse", help="Rebuild stored datasets from the raw-response archive (no network)")
+    rp.add_argument("--archive-dir", default="data/raw", help="Directory of the raw-response archive")
+    rp.add_argument("--symbol", help="Only reparse this symbol")
+    rp.add_argument("--symbols-file", help="Only reparse symbols in this file")
+    rp.add_argument("--historical-outdir", default="data/historical", help="Output directory for OHLC CSV files")
+    rp.add_argument("--fundamental-outdir", default="data/fundamental", help="Output directory for fundamental CSV files")
+    rp.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    rp.add_argument("--no-features", action="store_true", help="Don't update technical features after rebuilding")
+    rp.set_defaults(func=cmd_reparse)
+
     args = p.parse_args()
     if not args.cmd:
         p.print_help()
@@ -6,4 +6,13 @@ __all__ = [
     "symbols",
     "historical",
     "realtime",
+    "cache",
+    "archive",
+    "reparse",
+    "bars",
+    "quality",
+    "query",
+    "ratios",
+    "screener",
+    "features",
 ]
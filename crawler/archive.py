@@ -0,0 +1,140 @@
+"""Append-only, content-addressed archive of raw API/HTML responses.
+
+Every response body the fetchers receive is stored gzip-compressed under its
+sha256, so re-fetching identical data costs no extra space. An append-only
+JSON-lines index records what was fetched and when:
+
+- {root}/objects/ab/abcdef....gz   compressed response body
+- {root}/index.jsonl               one line per response: dataset, endpoint,
+                                   symbol, params, fetched_at, batch, sha256, kind
+
+`batch` groups responses that belong to one logical fetch (e.g. all pages of a
+paginated historical request). `crawler.reparse` rebuilds the CSV datasets
+from this archive without network access.
+"""
+import gzip
+import hashlib
+import json
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+
+# Default archive location; set to None to disable archiving
+ARCHIVE_DIR: Optional[str] = "data/raw"
+
+
+def set_archive_dir(path: Optional[str]):
+    """Change (or disable with None) the archive root used by the fetchers."""
+    global ARCHIVE_DIR
+    ARCHIVE_DIR = path
+
+
+def new_batch() -> str:
+    return uuid.uuid4().hex
+
+
+def _object_path(root: Path, sha: str) -> Path:
+    return root / "objects" / sha[:2] / f"{sha}.gz"
+
+
+def archive_response(
+    dataset: str,
+    endpoint: str,
+    symbol: str,
+    params: Optional[Dict],
+    content: bytes,
+    kind: str = "json",
+    batch: Optional[str] = None,
+    root: Optional[str] = None,
+) -> Optional[str]:
+    """Store a raw response body and append its index entry.
+
+    Args:
+        dataset: Logical dataset name (e.g. 'historical', 'fundamental/ratios')
+        endpoint: URL the response came from
+        symbol: Stock symbol the request was for
+        params: Request parameters (must be JSON-serializable)
+        content: Raw response body
+        kind: 'json' or 'html'
+        batch: Id shared by responses of one logical fetch (new one if omitted)
+        root: Archive root (defaults to ARCHIVE_DIR)
+
+    Returns:
+        sha256 of the body, or None if archiving is disabled or failed.
+        Archiving errors never interrupt a crawl.
+    """
+    root = root if root is not None else ARCHIVE_DIR
+    if not root:
+        return None
+    try:
+        # imported here: storage pulls in pandas, and fetchers have loaded it by now
+        from .storage import symbol_lock, atomic_write_bytes, ensure_dir, _append_bytes
+
+        if isinstance(content, str):
+            content = content.encode("utf-8")
+        root_path = Path(root)
+        sha = hashlib.sha256(content).hexdigest()
+        obj = _object_path(root_path, sha)
+        if not obj.exists():
+            atomic_write_bytes(obj, gzip.compress(content))
+
+        entry = {
+            "dataset": dataset,
+            "endpoint": endpoint,
+            "symbol": symbol,
+            "params": params or {},
+            "fetched_at": datetime.utcnow().isoformat(),
+            "batch": batch or new_batch(),
+            "sha256": sha,
+            "kind": kind,
+        }
+        line = json.dumps(entry, ensure_ascii=False, sort_keys=True) + "\n"
+        index_path = root_path / "index.jsonl"
+        ensure_dir(index_path)
+        with symbol_lock(root_path, "index"):
+            _append_bytes(index_path, line.encode("utf-8"))
+        return sha
+    except Exception as e:
+        print(f"Archive error for {symbol} ({dataset}): {e}")
+        return None
+
+
+def iter_index(
+    root: Optional[str] = None,
+    dataset: Optional[str] = None,
+    symbol: Optional[str] = None,
+) -> Iterator[Dict]:
+    """Yield index entries in append order, optionally filtered."""
+    root = root if root is not None else ARCHIVE_DIR
+    path = Path(root) / "index.jsonl"
+    if not path.exists():
+        return
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # tolerate a torn last line from an interrupted write
+                continue
+            if dataset is not None and entry.get("dataset") != dataset:
+                continue
+            if symbol is not None and entry.get("symbol") != symbol:
+                continue
+            yield entry
+
+
+def load_object(sha: str, root: Optional[str] = None) -> bytes:
+    """Return the decompressed body stored under `sha`."""
+    root = root if root is not None else ARCHIVE_DIR
+    with open(_object_path(Path(root), sha), "rb") as f:
+        return gzip.decompress(f.read())
+
+
+def load_json(sha: str, root: Optional[str] = None):
+    return json.loads(load_object(sha, root))
+
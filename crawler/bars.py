@@ -0,0 +1,208 @@
+"""Incremental intraday OHLCV bars from realtime ticks.
+
+`BarAggregator` keeps, per symbol and interval, the bar currently being built
+plus a fixed-size ring buffer of finalized bars. Each tick is O(1): it either
+updates the open bar or finalizes it and starts the next one. Finalized bars
+are returned (and passed to `on_bar`) as soon as a tick crosses an interval
+boundary, or when `flush` is called after the boundary has passed.
+"""
+from array import array
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+
+DEFAULT_INTERVALS = (60, 300, 900)
+DEFAULT_CAPACITY = 512  # finalized bars kept in memory per symbol/interval
+
+BAR_FIELDS = ("start", "open", "high", "low", "close", "volume")
+
+
+def interval_label(seconds: int) -> str:
+    if seconds % 3600 == 0:
+        return f"{seconds // 3600}h"
+    if seconds % 60 == 0:
+        return f"{seconds // 60}m"
+    return f"{seconds}s"
+
+
+def parse_interval(text: str) -> int:
+    """Parse '1m', '5m', '1h', '30s' or plain seconds into seconds."""
+    text = text.strip().lower()
+    units = {"s": 1, "m": 60, "h": 3600}
+    if text[-1:] in units:
+        return int(text[:-1]) * units[text[-1]]
+    return int(text)
+
+
+def _to_epoch(ts) -> float:
+    if isinstance(ts, (int, float)):
+        return float(ts)
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts)
+    if ts.tzinfo is None:
+        # realtime rows carry naive UTC timestamps
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+
+class _BarRing:
+    """Fixed-capacity ring of finalized bars, stored column-wise in float arrays."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.cols = [array("d", bytes(8 * capacity)) for _ in BAR_FIELDS]
+        self.head = 0  # next slot to write
+        self.size = 0
+
+    def push(self, bar: Tuple[float, ...]):
+        for col, value in zip(self.cols, bar):
+            col[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def __iter__(self):
+        start = (self.head - self.size) % self.capacity
+        for i in range(self.size):
+            j = (start + i) % self.capacity
+            yield tuple(col[j] for col in self.cols)
+
+
+class _BarState:
+    __slots__ = ("interval", "ring", "current", "last_start", "carry")
+
+    def __init__(self, interval: int, capacity: int):
+        self.interval = interval
+        self.ring = _BarRing(capacity)
+        self.current: Optional[List[float]] = None  # [start, open, high, low, close, volume]
+        self.last_start = float("-inf")  # start of the last finalized bar
+        self.carry = 0.0  # volume of late ticks, added to the next bar
+
+
+def _bar_dict(symbol: str, interval: int, bar) -> Dict:
+    out = dict(zip(BAR_FIELDS, bar))
+    out["start"] = datetime.fromtimestamp(out["start"], tz=timezone.utc).replace(tzinfo=None).isoformat()
+    out["symbol"] = symbol
+    out["interval"] = interval_label(interval)
+    return out
+
+
+class BarAggregator:
+    """Streaming OHLCV aggregator for many symbols and intervals.
+
+    Args:
+        intervals: Bar sizes in seconds
+        capacity: Finalized bars kept per symbol/interval (older ones are dropped)
+        on_bar: Optional callback receiving each finalized bar dict
+    """
+
+    def __init__(
+        self,
+        intervals: Iterable[int] = DEFAULT_INTERVALS,
+        capacity: int = DEFAULT_CAPACITY,
+        on_bar: Optional[Callable[[Dict], None]] = None,
+    ):
+        self.intervals = tuple(intervals)
+        self.capacity = capacity
+        self.on_bar = on_bar
+        self._states: Dict[str, List[_BarState]] = {}
+        self._last_cum_volume: Dict[str, float] = {}
+
+    def _states_for(self, symbol: str) -> List[_BarState]:
+        states = self._states.get(symbol)
+        if states is None:
+            states = [_BarState(i, self.capacity) for i in self.intervals]
+            self._states[symbol] = states
+        return states
+
+    def _finalize(self, symbol: str, state: _BarState, out: List[Dict]):
+        bar = tuple(state.current)
+        state.ring.push(bar)
+        state.current = None
+        state.last_start = bar[0]
+        d = _bar_dict(symbol, state.interval, bar)
+        out.append(d)
+        if self.on_bar:
+            self.on_bar(d)
+
+    def update(self, symbol: str, ts, price, volume=None, cum_volume=None) -> List[Dict]:
+        """Feed one tick; returns the bars finalized by it.
+
+        Args:
+            symbol: Stock or index symbol
+            ts: Tick time (datetime, ISO string or epoch seconds; naive = UTC)
+            price: Last traded price
+            volume: Volume traded since the previous tick
+            cum_volume: Cumulative session volume (as realtime rows report it);
+                converted to per-tick volume, resetting when it decreases
+        """
+        if price is None:
+            return []
+        try:
+            price = float(price)
+        except (TypeError, ValueError):
+            return []
+        if cum_volume is not None:
+            try:
+                cum_volume = float(cum_volume)
+                prev = self._last_cum_volume.get(symbol)
+                volume = cum_volume - prev if prev is not None and cum_volume >= prev else 0.0
+                self._last_cum_volume[symbol] = cum_volume
+            except (TypeError, ValueError):
+                volume = None
+        volume = float(volume or 0.0)
+        t = _to_epoch(ts)
+
+        out: List[Dict] = []
+        for state in self._states_for(symbol):
+            start = t - (t % state.interval)
+            cur = state.current
+            if cur is not None and start > cur[0]:
+                self._finalize(symbol, state, out)
+                cur = None
+            if cur is None:
+                if start <= state.last_start:
+                    # late tick for a bar that is already final: keep its volume only
+                    state.carry += volume
+                    continue
+                state.current = [start, price, price, price, price, volume + state.carry]
+                state.carry = 0.0
+            elif start == cur[0]:
+                if price > cur[2]:
+                    cur[2] = price
+                if price < cur[3]:
+                    cur[3] = price
+                cur[4] = price
+                cur[5] += volume
+            else:
+                cur[5] += volume  # tick older than the open bar: count its volume there
+        return out
+
+    def mark_final(self, symbol: str, interval: int, start) -> None:
+        """Treat bars of `symbol`/`interval` starting at or before `start` as final.
+
+        Used after a restart so intervals already persisted are not opened again.
+        """
+        t = _to_epoch(start)
+        for state in self._states_for(symbol):
+            if state.interval == interval:
+                state.last_start = max(state.last_start, t - (t % interval))
+
+    def flush(self, now=None) -> List[Dict]:
+        """Finalize open bars whose interval ended before `now` (default: current time)."""
+        t = _to_epoch(now if now is not None else datetime.utcnow())
+        out: List[Dict] = []
+        for symbol, states in self._states.items():
+            for state in states:
+                if state.current is not None and state.current[0] + state.interval <= t:
+                    self._finalize(symbol, state, out)
+        return out
+
+    def bars(self, symbol: str, interval: int, include_open: bool = True) -> List[Dict]:
+        """Return finalized bars (oldest first) plus, optionally, the bar in progress."""
+        for state in self._states.get(symbol, []):
+            if state.interval == interval:
+                out = [_bar_dict(symbol, interval, b) for b in state.ring]
+                if include_open and state.current is not None:
+                    out.append(_bar_dict(symbol, interval, state.current))
+                return out
+        return []
@@ -0,0 +1,133 @@
+"""In-process memoization for network fetchers.
+
+Wrapping a fetcher with `memoize` keeps its recent results in a bounded LRU
+with a TTL, and collapses concurrent calls for the same arguments into a single
+in-flight request (single-flight): the first caller performs the fetch, the
+others block on it and receive the same result.
+
+Empty results (`{}`, `[]`, empty DataFrame) are not cached because our fetchers
+return those on errors, and a transient failure should be retried.
+"""
+import copy
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from functools import wraps
+
+
+DEFAULT_MAXSIZE = 512
+DEFAULT_TTL = 600.0  # seconds
+
+
+def _is_empty(value) -> bool:
+    if value is None:
+        return True
+    empty = getattr(value, "empty", None)
+    if isinstance(empty, bool):
+        return empty
+    try:
+        return len(value) == 0
+    except TypeError:
+        return False
+
+
+def _make_key(signature, args, kwargs):
+    """Key calls by their bound arguments, so f("VIC"), f("VIC", True) and f(symbol="VIC") match."""
+    if signature is None:
+        return (args, tuple(sorted(kwargs.items())))
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    return (bound.args, tuple(sorted(bound.kwargs.items())))
+
+
+class _Memoized:
+    """Callable wrapper holding the LRU, the TTL and the in-flight table."""
+
+    def __init__(self, func, maxsize: int, ttl: float):
+        self.func = func
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._cache = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}  # key -> Future
+        self.hits = 0
+        self.misses = 0
+        try:
+            self._signature = inspect.signature(func)
+        except (TypeError, ValueError):  # builtins without introspectable signatures
+            self._signature = None
+        wraps(func)(self)
+
+    def __call__(self, *args, **kwargs):
+        key = _make_key(self._signature, args, kwargs)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > time.monotonic():
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    return copy.deepcopy(value)
+                del self._cache[key]
+            fut = self._inflight.get(key)
+            leader = fut is None
+            if leader:
+                fut = Future()
+                self._inflight[key] = fut
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if not leader:
+            return copy.deepcopy(fut.result())
+
+        try:
+            value = self.func(*args, **kwargs)
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            fut.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._inflight[key]
+            if not _is_empty(value):
+                self._cache[key] = (time.monotonic() + self.ttl, value)
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.maxsize:
+                    self._cache.popitem(last=False)
+        fut.set_result(value)
+        return copy.deepcopy(value)
+
+    def cache_clear(self):
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def cache_info(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._cache),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+            }
+
+
+def memoize(maxsize: int = DEFAULT_MAXSIZE, ttl: float = DEFAULT_TTL):
+    """Decorator adding LRU + TTL memoization with single-flight deduplication.
+
+    Args:
+        maxsize: Maximum number of cached results (least recently used evicted first)
+        ttl: Seconds a cached result stays valid
+
+    Callers receive a deep copy of the cached value, so mutating a result
+    (e.g. the dicts of a list) does not corrupt the cache.
+    """
+    def decorator(func):
+        return _Memoized(func, maxsize=maxsize, ttl=ttl)
+    return decorator
@@ -4,9 +4,13 @@ This module calls cafef's internal JSON APIs directly instead of scraping HTML.
 Much faster and more reliable than HTML parsing.
 """
 import requests
-import pandas as pd
-from typing import Optional, List
+from typing import Optional, List, TYPE_CHECKING
 from datetime import datetime
+from .cache import memoize
+from .archive import archive_response, new_batch
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 # API endpoints discovered from cafef.vn
@@ -20,13 +24,14 @@ DEFAULT_HEADERS = {
 }
 
 
+@memoize()
 def fetch_historical_api(
     symbol: str,
     start_date: str = "",
     end_date: str = "",
     page_size: int = 1000,
     max_pages: int = 10,
-) -> pd.DataFrame:
+) -> "pd.DataFrame":
     """Fetch historical OHLC data from cafef API.
 
     Args:
@@ -39,8 +44,11 @@ def fetch_historical_api(
     Returns:
         DataFrame with columns: date, open, high, low, close, volume, etc.
     """
+    import pandas as pd
+
     all_rows = []
     page_index = 1
+    batch = new_batch()
 
     while page_index <= max_pages:
         params = {
@@ -54,6 +62,7 @@ def fetch_historical_api(
             resp = requests.get(HISTORICAL_API, params=params, headers=DEFAULT_HEADERS, timeout=30)
             resp.raise_for_status()
             data = resp.json()
+            archive_response("historical", HISTORICAL_API, symbol, params, resp.content, batch=batch)
         except Exception as e:
             print(f"API error for {symbol} page {page_index}: {e}")
             break
@@ -0,0 +1,230 @@
+"""Incremental technical features over stored OHLC.
+
+Features (per symbol, on trading rows; names follow docs/NOTE.md):
+
+- ret_1d: log return ln(close / previous close)
+- ma_5, ma_20, ma_60: moving averages of close
+- vol_20d, vol_60d: standard deviation of ret_1d
+- avg_volume_20d: average volume
+- mom_1m, mom_3m, mom_6m, mom_12m: close / close 21, 63, 126, 252 rows ago - 1
+- mom_12m_1m: momentum from 12 months ago to 1 month ago
+- rev_5d, rev_20d: short-term reversal (negated 5/20-row return)
+- amihud_20d: average |ret_1d| / traded value
+
+Results go to `{symbol}_features.csv` next to `{symbol}_ohlc.csv`. A small
+state file remembers, per symbol, the last date, row count, byte size and
+sha1 of the OHLC file processed. When the file has only grown at the end (its
+first `size` bytes still hash the same), just the tail window (new rows plus
+`LOOKBACK` rows of history, located with the byte-range reader in
+`crawler.query`) is parsed and recomputed, and the new feature rows are
+appended. Any other change to a file, such as a repaired row in the middle,
+triggers a full recompute of that symbol.
+All symbols needing work are computed together in one vectorized pass.
+
+An update holds the state file's lock from reading the state to saving it, so
+concurrent crawlers sharing a data directory take turns instead of losing each
+other's progress.
+"""
+import hashlib
+import json
+from datetime import timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .query import read_symbol
+from .storage import symbol_lock, atomic_write_bytes, atomic_write_csv, append_csv_rows, last_csv_row
+
+
+LOOKBACK = 253  # rows of history the longest feature needs (mom_12m + 1)
+STATE_NAME = "_features_state.json"
+INPUT_COLUMNS = ["close", "volume", "value"]
+
+MA_WINDOWS = (5, 20, 60)
+VOL_WINDOWS = (20, 60)
+MOMENTUM = {"mom_1m": 21, "mom_3m": 63, "mom_6m": 126, "mom_12m": 252}
+REVERSAL = {"rev_5d": 5, "rev_20d": 20}
+
+
+def compute_features(frame: pd.DataFrame) -> pd.DataFrame:
+    """Compute all features for a long frame of symbol, date, close, volume[, value].
+
+    The frame must be sorted by symbol then date. Windows never cross symbols.
+    """
+    df = frame[["symbol", "date"]].copy()
+    close = frame["close"].astype(float)
+    volume = frame["volume"].astype(float) if "volume" in frame.columns else pd.Series(np.nan, index=frame.index)
+    if "value" in frame.columns:
+        value = frame["value"].astype(float)
+    else:
+        value = close * volume
+
+    def shifted(s: pd.Series, n: int) -> pd.Series:
+        return s.groupby(frame["symbol"], sort=False).shift(n)
+
+    def rolling(s: pd.Series, n: int, how: str) -> pd.Series:
+        r = s.groupby(frame["symbol"], sort=False).rolling(n, min_periods=n)
+        return getattr(r, how)().reset_index(level=0, drop=True)
+
+    ret = np.log(close / shifted(close, 1))
+    df["ret_1d"] = ret
+    for n in MA_WINDOWS:
+        df[f"ma_{n}"] = rolling(close, n, "mean")
+    for n in VOL_WINDOWS:
+        df[f"vol_{n}d"] = rolling(ret, n, "std")
+    df["avg_volume_20d"] = rolling(volume, 20, "mean")
+    for name, n in MOMENTUM.items():
+        df[name] = close / shifted(close, n) - 1
+    df["mom_12m_1m"] = shifted(close, 21) / shifted(close, 252) - 1
+    for name, n in REVERSAL.items():
+        df[name] = -(close / shifted(close, n) - 1)
+    illiq = ret.abs() / value.replace(0, np.nan)
+    df["amihud_20d"] = rolling(illiq, 20, "mean")
+    return df
+
+
+def _scan(path: Path, prefix: int = 0) -> Tuple[int, int, str, str]:
+    """One byte pass over a CSV, no parsing.
+
+    Returns (data rows, size, sha1 of the first `prefix` bytes, sha1 of the whole file).
+    """
+    count = size = 0
+    head, whole = hashlib.sha1(), hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            count += chunk.count(b"\n")
+            if size < prefix:
+                head.update(chunk[: prefix - size])
+            whole.update(chunk)
+            size += len(chunk)
+    return max(0, count - 1), size, head.hexdigest(), whole.hexdigest()
+
+
+def _load_state(data_dir: Path) -> Dict:
+    path = data_dir / STATE_NAME
+    if not path.exists():
+        return {}
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except ValueError:
+        return {}
+
+
+def _save_state(data_dir: Path, state: Dict):
+    atomic_write_bytes(data_dir / STATE_NAME, json.dumps(state, indent=1, sort_keys=True).encode("utf-8"))
+
+
+def _tail_window(path: Path, st: Dict, total: int) -> Optional[pd.DataFrame]:
+    """Read the rows needed to extend features past st['last_date'], or None if a full recompute is needed."""
+    last = pd.Timestamp(st["last_date"])
+    # ~252 trading days per year plus holidays: 1.8 calendar days per row is ample
+    start = last - timedelta(days=int(LOOKBACK * 1.8))
+    window = read_symbol(path, start=start, columns=INPUT_COLUMNS)
+    if window.empty:
+        return None
+    dates = pd.to_datetime(window["date"])
+    at_last = window[dates == last]
+    if len(at_last) != 1 or float(at_last["close"].iloc[0]) != st["last_close"]:
+        return None
+    new = int((dates > last).sum())
+    if total != st["rows"] + new:
+        return None  # rows were inserted or removed before the tail
+    history = int((dates <= last).sum())
+    if history < LOOKBACK and len(window) < total:
+        return None  # window too short to cover the lookback
+    return window
+
+
+def update_features(
+    symbols: Optional[Iterable[str]] = None,
+    data_dir: str = "data/historical",
+    full: bool = False,
+) -> Dict[str, int]:
+    """Bring `{symbol}_features.csv` up to date with the stored OHLC.
+
+    Args:
+        symbols: Symbols to update (default: every stored `*_ohlc.csv`)
+        data_dir: Directory of OHLC CSVs; feature files are written there too
+        full: Recompute everything instead of only new tail rows
+
+    Returns:
+        Dict symbol -> number of feature rows written (0 when already current).
+    """
+    base = Path(data_dir)
+    if symbols is None:
+        symbols = sorted(p.name[: -len("_ohlc.csv")] for p in base.glob("*_ohlc.csv"))
+    if not base.exists():
+        return {}
+    with symbol_lock(base, STATE_NAME):
+        return _update_locked(base, symbols, full)
+
+
+def _update_locked(base: Path, symbols: Iterable[str], full: bool) -> Dict[str, int]:
+    state = _load_state(base)
+
+    jobs: List[tuple] = []  # (symbol, frame, incremental, ohlc rows, size, sha1)
+    written: Dict[str, int] = {}
+    for sym in symbols:
+        path = base / f"{sym}_ohlc.csv"
+        if not path.exists():
+            continue
+        st = None if full else state.get(sym)
+        if st and ("size" not in st or not (base / f"{sym}_features.csv").exists()):
+            st = None  # state from an older version, or features file removed
+        # scan and read under the symbol lock so the digest matches the rows read
+        with symbol_lock(base, sym):
+            total, size, head, digest = _scan(path, st["size"] if st else 0)
+            window = None
+            if st and size >= st["size"] and head == st["sha1"]:
+                if size == st["size"]:
+                    written[sym] = 0
+                    continue
+                window = _tail_window(path, st, total)
+            if window is not None:
+                jobs.append((sym, window, True, total, size, digest))
+            else:
+                jobs.append((sym, read_symbol(path, columns=INPUT_COLUMNS), False, total, size, digest))
+
+    jobs = [j for j in jobs if not j[1].empty and "close" in j[1].columns]
+    if jobs:
+        frame = pd.concat([job[1].assign(symbol=job[0]) for job in jobs], ignore_index=True)
+        frame["date"] = pd.to_datetime(frame["date"], errors="coerce")
+        frame = frame.dropna(subset=["date"])
+        frame = frame.drop_duplicates(["symbol", "date"], keep="last")
+        frame = frame.sort_values(["symbol", "date"], kind="stable").reset_index(drop=True)
+        feats = compute_features(frame)
+        feats["_close"] = frame["close"]
+        by_symbol = dict(tuple(feats.groupby("symbol", sort=False)))
+
+        for sym, _, incremental, total, size, digest in jobs:
+            part = by_symbol.get(sym)
+            if part is None:
+                continue
+            last_date = part["date"].iloc[-1]
+            last_close = float(part["_close"].iloc[-1])
+            part = part.drop(columns=["symbol", "_close"])
+            out_path = base / f"{sym}_features.csv"
+            if incremental:
+                with symbol_lock(base, sym):
+                    # never append a date the features file already has
+                    after = pd.Timestamp(state[sym]["last_date"])
+                    tail = last_csv_row(out_path)
+                    if tail and tail.get("date"):
+                        after = max(after, pd.Timestamp(tail["date"]))
+                    part = part[part["date"] > after]
+                    append_csv_rows(out_path, part, date_format="%Y-%m-%d")
+            else:
+                atomic_write_csv(part, out_path, symbol=sym, index=False, date_format="%Y-%m-%d")
+            state[sym] = {
+                "last_date": last_date.strftime("%Y-%m-%d"),
+                "last_close": last_close,
+                "rows": total,
+                "size": size,
+                "sha1": digest,
+            }
+            written[sym] = len(part)
+
+    _save_state(base, state)
+    return written
@@ -7,6 +7,10 @@ import requests
 import pandas as pd
 from typing import Optional, List, Dict
 from pathlib import Path
+from .cache import memoize
+from .archive import archive_response
+from .storage import symbol_lock, atomic_write_csv
+from .ratios import RATIO_FIELDS, friendly_ratios  # noqa: F401  (re-exported)
 
 
 # TCBS API endpoints (public)
@@ -18,6 +22,7 @@ DEFAULT_HEADERS = {
 }
 
 
+@memoize()
 def fetch_overview(symbol: str) -> Dict:
     """Fetch company overview info.
 
@@ -31,12 +36,14 @@ def fetch_overview(symbol: str) -> Dict:
     try:
         r = requests.get(url, headers=DEFAULT_HEADERS, timeout=15)
         r.raise_for_status()
+        archive_response("fundamental/overview", url, symbol, {}, r.content)
         return r.json()
     except Exception as e:
         print(f"Error fetching overview for {symbol}: {e}")
         return {}
 
 
+@memoize()
 def fetch_financial_ratios(symbol: str, yearly: bool = True, all_data: bool = True) -> List[Dict]:
     """Fetch financial ratios (P/E, P/B, ROE, ROA, EPS, etc.)
 
@@ -54,12 +61,14 @@ def fetch_financial_ratios(symbol: str, yearly: bool = True, all_data: bool = Tr
     try:
         r = requests.get(url, headers=DEFAULT_HEADERS, timeout=15)
         r.raise_for_status()
+        archive_response("fundamental/ratios", url, symbol, {"yearly": yearly_param, "isAll": all_param}, r.content)
         return r.json()
     except Exception as e:
         print(f"Error fetching financial ratios for {symbol}: {e}")
         return []
 
 
+@memoize()
 def fetch_income_statement(symbol: str, yearly: bool = True) -> List[Dict]:
     """Fetch income statement data (revenue, profit, etc.)
 
@@ -70,12 +79,14 @@ def fetch_income_statement(symbol: str, yearly: bool = True) -> List[Dict]:
     try:
         r = requests.get(url, headers=DEFAULT_HEADERS, timeout=15)
         r.raise_for_status()
+        archive_response("fundamental/income", url, symbol, {"yearly": yearly_param, "isAll": "true"}, r.content)
         return r.json()
     except Exception as e:
         print(f"Error fetching income statement for {symbol}: {e}")
         return []
 
 
+@memoize()
 def fetch_balance_sheet(symbol: str, yearly: bool = True) -> List[Dict]:
     """Fetch balance sheet data (assets, liabilities, equity)."""
     yearly_param = "1" if yearly else "0"
@@ -83,12 +94,14 @@ def fetch_balance_sheet(symbol: str, yearly: bool = True) -> List[Dict]:
     try:
         r = requests.get(url, headers=DEFAULT_HEADERS, timeout=15)
         r.raise_for_status()
+        archive_response("fundamental/balance", url, symbol, {"yearly": yearly_param, "isAll": "true"}, r.content)
         return r.json()
     except Exception as e:
         print(f"Error fetching balance sheet for {symbol}: {e}")
         return []
 
 
+@memoize()
 def fetch_cash_flow(symbol: str, yearly: bool = True) -> List[Dict]:
     """Fetch cash flow statement data."""
     yearly_param = "1" if yearly else "0"
@@ -96,6 +109,7 @@ def fetch_cash_flow(symbol: str, yearly: bool = True) -> List[Dict]:
     try:
         r = requests.get(url, headers=DEFAULT_HEADERS, timeout=15)
         r.raise_for_status()
+        archive_response("fundamental/cashflow", url, symbol, {"yearly": yearly_param, "isAll": "true"}, r.content)
         return r.json()
     except Exception as e:
         print(f"Error fetching cash flow for {symbol}: {e}")
@@ -128,56 +142,64 @@ def save_fundamental_csv(symbol: str, out_dir: str = "data/fundamental") -> Dict
 
     Returns dict mapping data type to file path.
     """
+    return write_fundamental_csv(symbol, fetch_all_fundamental(symbol), out_dir=out_dir)
+
+
+def write_fundamental_csv(symbol: str, data: Dict, out_dir: str = "data/fundamental") -> Dict[str, str]:
+    """Write already-fetched fundamental data (as returned by `fetch_all_fundamental`) to CSV files.
+
+    Missing or empty keys are skipped. Returns dict mapping data type to file path.
+    """
     # Create per-symbol subfolder
     symbol_dir = Path(out_dir) / symbol
     symbol_dir.mkdir(parents=True, exist_ok=True)
     paths = {}
 
-    data = fetch_all_fundamental(symbol)
-
-    # Overview - single row
-    if data["overview"]:
-        df = pd.DataFrame([data["overview"]])
-        path = symbol_dir / "overview.csv"
-        df.to_csv(path, index=False)
-        paths["overview"] = str(path)
-
-    # Ratios - time series
-    if data["ratios"]:
-        df = pd.DataFrame(data["ratios"])
-        # Sort by year and quarter
-        if "year" in df.columns:
-            df = df.sort_values(["year", "quarter"] if "quarter" in df.columns else ["year"])
-        path = symbol_dir / "ratios.csv"
-        df.to_csv(path, index=False)
-        paths["ratios"] = str(path)
-
-    # Income statement
-    if data["income"]:
-        df = pd.DataFrame(data["income"])
-        if "year" in df.columns:
-            df = df.sort_values(["year", "quarter"] if "quarter" in df.columns else ["year"])
-        path = symbol_dir / "income.csv"
-        df.to_csv(path, index=False)
-        paths["income"] = str(path)
-
-    # Balance sheet
-    if data["balance"]:
-        df = pd.DataFrame(data["balance"])
-        if "year" in df.columns:
-            df = df.sort_values(["year", "quarter"] if "quarter" in df.columns else ["year"])
-        path = symbol_dir / "balance.csv"
-        df.to_csv(path, index=False)
-        paths["balance"] = str(path)
-
-    # Cash flow
-    if data["cashflow"]:
-        df = pd.DataFrame(data["cashflow"])
-        if "year" in df.columns:
-            df = df.sort_values(["year", "quarter"] if "quarter" in df.columns else ["year"])
-        path = symbol_dir / "cashflow.csv"
-        df.to_csv(path, index=False)
-        paths["cashflow"] = str(path)
+    # Replace each file atomically while holding the symbol lock
+    with symbol_lock(out_dir, symbol):
+        # Overview - single row
+        if data.get("overview"):
+            df = pd.DataFrame([data["overview"]])
+            path = symbol_dir / "overview.csv"
+            atomic_write_csv(df, path, index=False)
+            paths["overview"] = str(path)
+
+        # Ratios - time series
+        if data.get("ratios"):
+            df = pd.DataFrame(data["ratios"])
+            # Sort by year and quarter
+            if "year" in df.columns:
+                df = df.sort_values(["year", "quarter"] if "quarter" in df.columns else ["year"])
+            path = symbol_dir / "ratios.csv"
+            atomic_write_csv(df, path, index=False)
+            paths["ratios"] = str(path)
+
+        # Income statement
+        if data.get("income"):
+            df = pd.DataFrame(data["income"])
+            if "year" in df.columns:
+                df = df.sort_values(["year", "quarter"] if "quarter" in df.columns else ["year"])
+            path = symbol_dir / "income.csv"
+            atomic_write_csv(df, path, index=False)
+            paths["income"] = str(path)
+
+        # Balance sheet
+        if data.get("balance"):
+            df = pd.DataFrame(data["balance"])
+            if "year" in df.columns:
+                df = df.sort_values(["year", "quarter"] if "quarter" in df.columns else ["year"])
+            path = symbol_dir / "balance.csv"
+            atomic_write_csv(df, path, index=False)
+            paths["balance"] = str(path)
+
+        # Cash flow
+        if data.get("cashflow"):
+            df = pd.DataFrame(data["cashflow"])
+            if "year" in df.columns:
+                df = df.sort_values(["year", "quarter"] if "quarter" in df.columns else ["year"])
+            path = symbol_dir / "cashflow.csv"
+            atomic_write_csv(df, path, index=False)
+            paths["cashflow"] = str(path)
 
     return paths
 
@@ -195,21 +217,4 @@ def get_latest_ratios(symbol: str) -> Dict:
     latest = ratios[0]
     
     # Map to friendly names
-    return {
-        "symbol": symbol,
-        "year": latest.get("year"),
-        "quarter": latest.get("quarter"),
-        "P/E": latest.get("priceToEarning"),
-        "P/B": latest.get("priceToBook"),
-        "ROE": latest.get("roe"),
-        "ROA": latest.get("roa"),
-        "EPS": latest.get("earningPerShare"),
-        "BVPS": latest.get("bookValuePerShare"),
-        "dividend": latest.get("dividend"),
-        "gross_margin": latest.get("grossProfitMargin"),
-        "operating_margin": latest.get("operatingMargin"),
-        "net_margin": latest.get("netProfitMargin"),
-        "current_ratio": latest.get("currentPayment"),
-        "quick_ratio": latest.get("quickPayment"),
-        "debt_to_equity": latest.get("equityOnLiability"),
-    }
+    return friendly_ratios(symbol, latest)
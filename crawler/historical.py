@@ -9,6 +9,8 @@ from bs4 import BeautifulSoup
 import pandas as pd
 from .cafef_parser import find_first_table_with_date
 from .storage import save_ohlc_csv
+from .cache import memoize
+from .archive import archive_response, new_batch
 import re
 
 
@@ -16,6 +18,7 @@ import re
 CAFEF_HISTORICAL_API = "https://cafef.vn/du-lieu/Ajax/PageNew/DataHistory/PriceHistory.ashx"
 
 
+@memoize()
 def fetch_historical_from_api(
     symbol: str,
     start_date: str = "",
@@ -41,6 +44,7 @@ def fetch_historical_from_api(
     }
     all_rows = []
     page_index = 1
+    batch = new_batch()
 
     while page_index <= max_pages:
         params = {
@@ -54,6 +58,7 @@ def fetch_historical_from_api(
             resp = requests.get(CAFEF_HISTORICAL_API, params=params, headers=headers, timeout=30)
             resp.raise_for_status()
             data = resp.json()
+            archive_response("historical", CAFEF_HISTORICAL_API, symbol, params, resp.content, batch=batch)
         except Exception as e:
             print(f"API error for {symbol} page {page_index}: {e}")
             break
@@ -70,10 +75,15 @@ def fetch_historical_from_api(
             break
         page_index += 1
 
-    if not all_rows:
+    return parse_historical_rows(all_rows)
+
+
+def parse_historical_rows(rows: list) -> pd.DataFrame:
+    """Convert raw cafef API rows into an OHLC DataFrame with standard column names."""
+    if not rows:
         return pd.DataFrame()
 
-    df = pd.DataFrame(all_rows)
+    df = pd.DataFrame(rows)
 
     # Rename columns to standard OHLC names
     column_map = {
@@ -99,6 +109,29 @@ def fetch_historical_from_api(
     return df
 
 
+def normalize_ohlc(df: pd.DataFrame) -> pd.DataFrame:
+    """Locate the date column, parse it and return the frame sorted and indexed by date."""
+    # Ensure date column exists and is properly formatted
+    if "date" not in df.columns:
+        # Find first column that looks like a date and rename it
+        for col in df.columns:
+            sample = df[col].astype(str).head(5).tolist()
+            if any(re.search(r"\d{1,2}[/-]\d{1,2}[/-]\d{2,4}", s) for s in sample):
+                df = df.rename(columns={col: "date"})
+                break
+
+    # Convert date and sort
+    if "date" in df.columns:
+        try:
+            df["date"] = pd.to_datetime(df["date"], dayfirst=True, errors="coerce")
+            df = df.sort_values("date")
+            df = df.set_index("date")
+        except Exception:
+            pass
+
+    return df
+
+
 def _render_page_with_playwright(url: str, timeout: int = 45) -> str:
     """Render the given URL with Playwright and return the page HTML."""
     try:
@@ -150,6 +183,7 @@ def fetch_historical(symbol: str, url_template: Optional[str] = None, out_dir: s
             })
             resp.raise_for_status()
             html = resp.text
+            archive_response("historical_html", url, symbol, {}, resp.content, kind="html")
             soup = BeautifulSoup(html, "html.parser")
             df = find_first_table_with_date(soup)
 
@@ -159,6 +193,7 @@ def fetch_historical(symbol: str, url_template: Optional[str] = None, out_dir: s
                 print(f"No table in raw HTML, trying Playwright for {symbol}...")
                 try:
                     rendered = _render_page_with_playwright(url)
+                    archive_response("historical_rendered", url, symbol, {}, rendered, kind="html")
                     soup = BeautifulSoup(rendered, "html.parser")
                     df = find_first_table_with_date(soup)
                 except ImportError as ie:
@@ -171,23 +206,6 @@ def fetch_historical(symbol: str, url_template: Optional[str] = None, out_dir: s
     if df.empty:
         return None
 
-    # Ensure date column exists and is properly formatted
-    if "date" not in df.columns:
-        # Find first column that looks like a date and rename it
-        for col in df.columns:
-            sample = df[col].astype(str).head(5).tolist()
-            if any(re.search(r"\d{1,2}[/-]\d{1,2}[/-]\d{2,4}", s) for s in sample):
-                df = df.rename(columns={col: "date"})
-                break
-
-    # Convert date and sort
-    if "date" in df.columns:
-        try:
-            df["date"] = pd.to_datetime(df["date"], dayfirst=True, errors="coerce")
-            df = df.sort_values("date")
-            df = df.set_index("date")
-        except Exception:
-            pass
-
+    df = normalize_ohlc(df)
     save_ohlc_csv(symbol, df, out_dir=out_dir)
     return f"{out_dir}/{symbol}_ohlc.csv"
@@ -0,0 +1,234 @@
+"""Data-quality scanner for stored OHLC and targeted gap backfill.
+
+`scan` loads every `{symbol}_ohlc.csv` into one long frame and checks the
+whole universe at once with vectorized pandas operations:
+
+- gap: trading days missing between a symbol's first and last stored date
+- stale: trading days after a symbol's last stored date (its file stopped updating)
+- duplicate: the same date stored more than once
+- high_low: high < low
+- close_range: close outside [low, high]
+- off_calendar: a stored date that is not a trading day
+
+The trading calendar is either weekdays minus a holiday list, or (by default)
+inferred from the data: a weekday is a trading day when at least
+`min_coverage` of the symbols listed at that time have a row for it. The
+calendar is always built from every stored symbol, even when only some are
+checked.
+
+`backfill` turns the reported issues into date windows and refetches only
+those windows from the cafef API (`StartDate`/`EndDate`), merging the result
+into the stored files.
+"""
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+ISSUE_COLUMNS = ["symbol", "kind", "start", "end", "count"]
+REPAIRABLE_KINDS = ("gap", "stale", "duplicate", "high_low", "close_range")
+
+
+def load_ohlc_frame(data_dir: str = "data/historical", symbols: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """Load stored OHLC files into one frame with columns symbol, date, open, high, low, close."""
+    wanted = set(symbols) if symbols is not None else None
+    frames = []
+    for path in sorted(Path(data_dir).glob("*_ohlc.csv")):
+        symbol = path.name[: -len("_ohlc.csv")]
+        if wanted is not None and symbol not in wanted:
+            continue
+        try:
+            df = pd.read_csv(path, usecols=lambda c: c in ("date", "open", "high", "low", "close"))
+        except Exception as e:
+            print(f"Could not read {path}: {e}")
+            continue
+        if "date" not in df.columns or df.empty:
+            continue
+        df["symbol"] = symbol
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame(columns=["symbol", "date", "open", "high", "low", "close"])
+    frame = pd.concat(frames, ignore_index=True)
+    frame["date"] = pd.to_datetime(frame["date"], errors="coerce")
+    frame = frame.dropna(subset=["date"])
+    for col in ("open", "high", "low", "close"):
+        if col in frame.columns:
+            frame[col] = pd.to_numeric(frame[col], errors="coerce")
+    frame["symbol"] = frame["symbol"].astype("category")
+    return frame
+
+
+def build_calendar(
+    frame: pd.DataFrame,
+    holidays: Optional[Iterable] = None,
+    min_coverage: float = 0.5,
+) -> pd.DatetimeIndex:
+    """Return the trading days spanned by `frame`.
+
+    With `holidays`, the calendar is every weekday minus those dates. Otherwise
+    a weekday counts as a trading day when at least `min_coverage` of the
+    symbols whose history spans it have a row on that day.
+    """
+    if frame.empty:
+        return pd.DatetimeIndex([])
+    lo, hi = frame["date"].min(), frame["date"].max()
+    weekdays = pd.bdate_range(lo, hi)
+    if holidays is not None:
+        return weekdays.difference(pd.DatetimeIndex(pd.to_datetime(list(holidays))))
+
+    bounds = frame.groupby("symbol", observed=True)["date"].agg(["min", "max"])
+    firsts = np.sort(bounds["min"].values)
+    lasts = np.sort(bounds["max"].values)
+    days = weekdays.values
+    active = np.searchsorted(firsts, days, side="right") - np.searchsorted(lasts, days, side="left")
+    counts = frame.drop_duplicates(["symbol", "date"])["date"].value_counts()
+    observed = counts.reindex(weekdays, fill_value=0).values
+    keep = (active > 0) & (observed >= np.maximum(1, min_coverage * active))
+    return weekdays[keep]
+
+
+def scan(
+    data_dir: str = "data/historical",
+    symbols: Optional[Iterable[str]] = None,
+    holidays: Optional[Iterable] = None,
+    min_coverage: float = 0.5,
+    frame: Optional[pd.DataFrame] = None,
+) -> pd.DataFrame:
+    """Scan stored OHLC data and return one row per issue.
+
+    Returns:
+        DataFrame with columns symbol, kind, start, end, count. Row-level
+        anomalies have start == end; gaps span the missing trading days.
+    """
+    if frame is None:
+        frame = load_ohlc_frame(data_dir)
+    if frame.empty:
+        return pd.DataFrame(columns=ISSUE_COLUMNS)
+    # the calendar needs the whole universe; a single symbol cannot vote its own gaps away
+    calendar = build_calendar(frame, holidays=holidays, min_coverage=min_coverage)
+    if symbols is not None:
+        frame = frame[frame["symbol"].isin(set(symbols))]
+        frame = frame.assign(symbol=frame["symbol"].cat.remove_unused_categories())
+        if frame.empty:
+            return pd.DataFrame(columns=ISSUE_COLUMNS)
+    issues = []
+
+    # Row-level anomalies
+    dup = frame.duplicated(["symbol", "date"], keep="first")
+    checks = {"duplicate": dup.values}
+    if {"high", "low"} <= set(frame.columns):
+        checks["high_low"] = (frame["high"] < frame["low"]).values
+        if "close" in frame.columns:
+            checks["close_range"] = ((frame["close"] < frame["low"]) | (frame["close"] > frame["high"])).values
+    checks["off_calendar"] = ~frame["date"].isin(calendar).values
+    for kind, mask in checks.items():
+        if mask.any():
+            hit = frame.loc[mask, ["symbol", "date"]]
+            issues.append(pd.DataFrame({
+                "symbol": hit["symbol"].astype(str).values,
+                "kind": kind,
+                "start": hit["date"].values,
+                "end": hit["date"].values,
+                "count": 1,
+            }))
+
+    # Gaps: position of each stored date in the calendar, then look for jumps > 1
+    uniq = frame.loc[~dup & frame["date"].isin(calendar), ["symbol", "date"]]
+    uniq = uniq.sort_values(["symbol", "date"])
+    pos = calendar.searchsorted(uniq["date"].values)
+    sym = uniq["symbol"].cat.codes.values
+    same = np.r_[False, sym[1:] == sym[:-1]]
+    step = np.r_[0, np.diff(pos)]
+    gap = same & (step > 1)
+    if gap.any():
+        cur = pos[gap]
+        prev = cur - step[gap]
+        issues.append(pd.DataFrame({
+            "symbol": uniq["symbol"].astype(str).values[gap],
+            "kind": "gap",
+            "start": calendar[prev + 1],
+            "end": calendar[cur - 1],
+            "count": step[gap] - 1,
+        }))
+
+    # Stale: last stored date of each symbol behind the end of the calendar
+    if len(calendar) and len(uniq):
+        last_pos = pd.Series(pos).groupby(sym).max()
+        behind = len(calendar) - 1 - last_pos.values
+        stale = behind > 0
+        if stale.any():
+            names = uniq["symbol"].cat.categories[last_pos.index.values]
+            issues.append(pd.DataFrame({
+                "symbol": np.asarray(names, dtype=str)[stale],
+                "kind": "stale",
+                "start": calendar[last_pos.values[stale] + 1],
+                "end": calendar[-1],
+                "count": behind[stale],
+            }))
+
+    if not issues:
+        return pd.DataFrame(columns=ISSUE_COLUMNS)
+    out = pd.concat(issues, ignore_index=True)[ISSUE_COLUMNS]
+    return out.sort_values(["symbol", "start", "kind"]).reset_index(drop=True)
+
+
+def repair_windows(issues: pd.DataFrame, merge_days: int = 7) -> pd.DataFrame:
+    """Collapse issues into per-symbol date windows to refetch.
+
+    Windows closer than `merge_days` calendar days are merged so that nearby
+    problems cost one request instead of several.
+    """
+    if issues.empty:
+        return pd.DataFrame(columns=["symbol", "start", "end"])
+    df = issues[["symbol", "start", "end"]].sort_values(["symbol", "start"]).reset_index(drop=True)
+    prev_end = df.groupby("symbol")["end"].transform(lambda s: s.cummax().shift())
+    new_window = prev_end.isna() | (df["start"] - prev_end > pd.Timedelta(days=merge_days))
+    df["window"] = new_window.cumsum()
+    return df.groupby("window").agg(symbol=("symbol", "first"), start=("start", "min"), end=("end", "max")).reset_index(drop=True)
+
+
+def backfill(
+    issues: pd.DataFrame,
+    data_dir: str = "data/historical",
+    merge_days: int = 7,
+    kinds: Iterable[str] = REPAIRABLE_KINDS,
+) -> List[dict]:
+    """Refetch only the broken date windows and merge them into the stored files.
+
+    Only issues whose kind is in `kinds` are repaired (refetching cannot fix
+    an off-calendar row). Returns a list of {symbol, start, end, rows} per
+    window fetched.
+    """
+    from .historical import fetch_historical_from_api, normalize_ohlc
+    from .storage import symbol_lock, atomic_write_csv
+
+    results = []
+    windows = repair_windows(issues[issues["kind"].isin(list(kinds))], merge_days=merge_days)
+    for symbol, group in windows.groupby("symbol"):
+        path = Path(data_dir) / f"{symbol}_ohlc.csv"
+        fetched = []
+        for row in group.itertuples(index=False):
+            df = fetch_historical_from_api(
+                symbol,
+                start_date=row.start.strftime("%d/%m/%Y"),
+                end_date=row.end.strftime("%d/%m/%Y"),
+            )
+            results.append({"symbol": symbol, "start": row.start, "end": row.end, "rows": len(df)})
+            if not df.empty:
+                fetched.append(normalize_ohlc(df))
+        if not fetched:
+            continue
+        new = pd.concat(fetched)
+        new = new[~new.index.duplicated(keep="last")]
+        # read, merge and replace under one lock so a concurrent full refresh is not overwritten
+        with symbol_lock(data_dir, symbol):
+            stored = pd.read_csv(path, index_col="date", parse_dates=["date"]) if path.exists() else pd.DataFrame()
+            if not stored.empty:
+                # drop stored rows (including duplicates) for every refetched date, then merge
+                stored = stored[~stored.index.isin(new.index)]
+                new = pd.concat([stored, new])
+            # same layout as save_ohlc_csv, which would take this lock again
+            atomic_write_csv(new.sort_index(), path, index=True)
+    return results
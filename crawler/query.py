@@ -0,0 +1,191 @@
+"""Ad-hoc queries over stored OHLC with predicate pushdown.
+
+Predicates are applied before parsing instead of after loading everything:
+
+- symbols: only `{symbol}_ohlc.csv` files for the requested symbols are opened
+- date range: stored files are sorted by date with ISO dates in the first
+  column, so the byte offsets of the range are found by binary search over the
+  file and only that slice is read
+- columns: only the projected columns are parsed (`usecols`)
+
+Results are streamed per symbol, so memory stays bounded by the largest slice.
+"""
+import io
+import os
+import sys
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Union
+
+import pandas as pd
+
+
+def _as_iso(value) -> Optional[str]:
+    if value is None or value == "":
+        return None
+    if isinstance(value, (date, datetime)):
+        return value.strftime("%Y-%m-%d")
+    return pd.Timestamp(value).strftime("%Y-%m-%d")
+
+
+def _seek_line_start(f, offset: int, data_start: int) -> int:
+    """Return the offset of the first line starting at or after `offset`."""
+    if offset <= data_start:
+        return data_start
+    f.seek(offset - 1)
+    f.readline()  # finish the line `offset - 1` is in
+    return f.tell()
+
+
+def _first_offset(f, key: bytes, data_start: int, size: int, inclusive: bool) -> int:
+    """Binary search for the first line whose date is >= key (or > key if not inclusive)."""
+    lo, hi = data_start, size
+    while lo < hi:
+        mid = (lo + hi) // 2
+        line_start = _seek_line_start(f, mid, data_start)
+        if line_start < size:
+            f.seek(line_start)
+            line_date = f.readline().split(b",", 1)[0][:10]
+            before = line_date < key if inclusive else line_date <= key
+            if before:
+                lo = mid + 1
+                continue
+        hi = mid
+    return _seek_line_start(f, lo, data_start)
+
+
+def read_symbol(
+    path: Union[str, Path],
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    columns: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """Read the rows of one stored OHLC file within [start, end], projecting `columns`.
+
+    Args:
+        path: Path to `{symbol}_ohlc.csv`
+        start: First date (inclusive), ISO string or date-like
+        end: Last date (inclusive)
+        columns: Columns to return besides `date` (default: all)
+    """
+    start, end = _as_iso(start), _as_iso(end)
+    usecols = None
+    if columns:
+        wanted = {"date", *columns}
+        usecols = lambda c: c in wanted  # noqa: E731
+
+    with open(path, "rb") as f:
+        # size of the file we opened (writers replace files atomically)
+        size = os.fstat(f.fileno()).st_size
+        header = f.readline()
+        data_start = f.tell()
+        if not header.startswith(b"date,"):
+            # not in the layout save_ohlc_csv writes: read fully and filter
+            df = pd.read_csv(path, usecols=usecols)
+            if "date" in df.columns:
+                d = pd.to_datetime(df["date"], errors="coerce")
+                if start:
+                    df = df[d >= start]
+                if end:
+                    df = df[d <= end]
+            return df.reset_index(drop=True)
+        lo = _first_offset(f, start.encode(), data_start, size, inclusive=True) if start else data_start
+        hi = _first_offset(f, end.encode(), data_start, size, inclusive=False) if end else size
+        if hi <= lo:
+            return pd.read_csv(io.BytesIO(header), usecols=usecols)
+        f.seek(lo)
+        body = f.read(hi - lo)
+    return pd.read_csv(io.BytesIO(header + body), usecols=usecols)
+
+
+def query(
+    symbols: Optional[Iterable[str]] = None,
+    start=None,
+    end=None,
+    columns: Optional[List[str]] = None,
+    data_dir: str = "data/historical",
+) -> Iterator[pd.DataFrame]:
+    """Yield one DataFrame per symbol (with a leading `symbol` column) matching the predicates."""
+    base = Path(data_dir)
+    if symbols is None:
+        paths = sorted(base.glob("*_ohlc.csv"))
+    else:
+        paths = [base / f"{s}_ohlc.csv" for s in symbols]
+    for path in paths:
+        if not path.exists():
+            continue
+        df = read_symbol(path, start=start, end=end, columns=columns)
+        if df.empty:
+            continue
+        df.insert(0, "symbol", path.name[: -len("_ohlc.csv")])
+        if columns:
+            df = df[["symbol", "date"] + [c for c in columns if c in df.columns and c != "date"]]
+        yield df
+
+
+def query_frame(*args, **kwargs) -> pd.DataFrame:
+    """Like `query` but returns all matching rows in a single DataFrame."""
+    frames = list(query(*args, **kwargs))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+
+
+def last_days_start(days: int) -> str:
+    return (date.today() - timedelta(days=days)).strftime("%Y-%m-%d")
+
+
+def write_results(frames: Iterable[pd.DataFrame], fmt: str = "csv", output: Optional[str] = None) -> int:
+    """Stream query results as CSV, JSON lines or Parquet to `output` (default stdout).
+
+    Returns the number of rows written. Parquet needs `pyarrow` and is written
+    in one row group per symbol.
+    """
+    rows = 0
+    if fmt == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except Exception as e:
+            raise ImportError("Parquet output requires pyarrow. Install with `pip install pyarrow`.") from e
+        sink = output or sys.stdout.buffer
+        writer = None
+        try:
+            for df in frames:
+                # a single file needs one schema: numbers as float64, columns as in the first frame
+                num = df.select_dtypes("number").columns
+                df = df.astype({c: "float64" for c in num})
+                if writer is not None:
+                    df = df.reindex(columns=writer.schema.names)
+                table = pa.Table.from_pandas(df, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(sink, table.schema)
+                else:
+                    table = table.cast(writer.schema)
+                writer.write_table(table)
+                rows += len(df)
+        finally:
+            if writer is not None:
+                writer.close()
+        return rows
+
+    out = open(output, "w", encoding="utf-8", newline="") if output else sys.stdout
+    try:
+        columns = None  # CSV has one header: later frames are aligned to the first one's columns
+        for df in frames:
+            if fmt == "json":
+                text = df.to_json(orient="records", lines=True, force_ascii=False)
+                out.write(text if text.endswith("\n") else text + "\n")
+            else:
+                if columns is None:
+                    columns = list(df.columns)
+                    df.to_csv(out, header=True, index=False)
+                else:
+                    extra = [c for c in df.columns if c not in columns]
+                    if extra:
+                        symbol = df["symbol"].iloc[0] if "symbol" in df.columns and len(df) else "?"
+                        print(f"Dropping columns not in the CSV header for {symbol}: {', '.join(map(str, extra))}", file=sys.stderr)
+                    df.reindex(columns=columns).to_csv(out, header=False, index=False)
+            rows += len(df)
+    finally:
+        if output:
+            out.close()
+    return rows
@@ -0,0 +1,36 @@
+"""Friendly names for TCBS financial ratios.
+
+Kept apart from `crawler.fundamental` so offline users (the screener) don't
+import the HTTP stack.
+"""
+from typing import Dict
+
+
+# Friendly ratio names -> TCBS financialratio fields
+RATIO_FIELDS = {
+    "P/E": "priceToEarning",
+    "P/B": "priceToBook",
+    "ROE": "roe",
+    "ROA": "roa",
+    "EPS": "earningPerShare",
+    "BVPS": "bookValuePerShare",
+    "dividend": "dividend",
+    "gross_margin": "grossProfitMargin",
+    "operating_margin": "operatingMargin",
+    "net_margin": "netProfitMargin",
+    "current_ratio": "currentPayment",
+    "quick_ratio": "quickPayment",
+    "debt_to_equity": "equityOnLiability",
+}
+
+
+def friendly_ratios(symbol: str, row: Dict) -> Dict:
+    """Map one raw ratio record to the friendly names used by `get_latest_ratios`."""
+    out = {
+        "symbol": symbol,
+        "year": row.get("year"),
+        "quarter": row.get("quarter"),
+    }
+    for name, field in RATIO_FIELDS.items():
+        out[name] = row.get(field)
+    return out
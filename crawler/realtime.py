@@ -0,0 +1,247 @@
+"""Realtime pollers: per-symbol rows with intraday bars, and indices with delta storage.
+
+`REALTIME_API` returns all indices in one response, so each tick costs a single
+request. Instead of writing the full snapshot on every poll, only the fields
+that changed since the previous tick are appended, as one compact JSON line:
+
+    {"t":"2024-01-02T02:15:00","k":1,"d":{"VNINDEX":{"last":1130.5,...},...}}   keyframe (full snapshot)
+    {"t":"2024-01-02T02:15:05","d":{"VNINDEX":{"last":1130.7}}}                 delta
+    {"t":"2024-01-02T02:15:10","d":{"VNINDEX":{"-":["note"]}}}                  field removed
+
+A keyframe starts every file (one file per UTC day) and every restart; ticks
+with no change write nothing, and only responses that produced a record are
+added to the raw archive. `replay_deltas` rebuilds full snapshots.
+
+`poll_symbols` appends one row per symbol and tick to `{symbol}_realtime.csv`
+and feeds a `BarAggregator`, persisting each finalized bar as it closes.
+"""
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+
+from .cafef_api import REALTIME_API, DEFAULT_HEADERS, fetch_realtime_price
+from .archive import archive_response
+from .bars import BarAggregator, DEFAULT_INTERVALS, interval_label
+
+
+# Row fields that can identify an index, in order of preference
+INDEX_KEY_FIELDS = ["Symbol", "symbol", "Index", "index", "Code", "code", "Name", "name", "IndexName"]
+
+
+def _extract_rows(payload) -> list:
+    """Find the list of index rows inside the API payload (shape varies by endpoint version)."""
+    if isinstance(payload, list):
+        return [r for r in payload if isinstance(r, dict)]
+    if isinstance(payload, dict):
+        for key in ("Data", "data", "Items", "items"):
+            if key in payload:
+                rows = _extract_rows(payload[key])
+                if rows:
+                    return rows
+    return []
+
+
+def parse_index_snapshot(payload) -> Dict[str, Dict]:
+    """Map each index name to its row of fields."""
+    snapshot = {}
+    for pos, row in enumerate(_extract_rows(payload)):
+        key = None
+        for field in INDEX_KEY_FIELDS:
+            if row.get(field):
+                key = str(row[field]).strip()
+                break
+        snapshot[key or str(pos)] = row
+    return snapshot
+
+
+def _fetch_index_payload() -> Tuple[Dict[str, Dict], Optional[bytes]]:
+    try:
+        resp = requests.get(REALTIME_API, headers=DEFAULT_HEADERS, timeout=15)
+        resp.raise_for_status()
+        payload = resp.json()
+    except Exception as e:
+        print(f"Realtime index fetch error: {e}")
+        return {}, None
+    return parse_index_snapshot(payload), resp.content
+
+
+def fetch_index_snapshot() -> Dict[str, Dict]:
+    """Fetch all indices from cafef in one request.
+
+    Returns:
+        Dict of index name -> fields, or empty dict on error.
+    """
+    return _fetch_index_payload()[0]
+
+
+REMOVED_KEY = "-"  # per-index list of fields that disappeared
+
+
+def diff_snapshot(prev: Dict[str, Dict], cur: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Return {index: {field: new_value}} for every field that changed or appeared.
+
+    Fields that disappeared from an index are listed under `REMOVED_KEY`;
+    indices that disappeared are recorded as {index: None}.
+    """
+    delta = {}
+    for key, row in cur.items():
+        old = prev.get(key, {})
+        changed = {f: v for f, v in row.items() if f not in old or old[f] != v}
+        removed = [f for f in old if f not in row]
+        if removed:
+            changed[REMOVED_KEY] = removed
+        if changed:
+            delta[key] = changed
+    for key in prev:
+        if key not in cur:
+            delta[key] = None
+    return delta
+
+
+class IndexDeltaWriter:
+    """Append snapshots to `{out_dir}/indices_{YYYYMMDD}.jsonl` as keyframe + deltas."""
+
+    def __init__(self, out_dir: str = "data/realtime", keyframe_every: Optional[int] = None):
+        self.out_dir = Path(out_dir)
+        self.keyframe_every = keyframe_every
+        self._state: Dict[str, Dict] = {}
+        self._path: Optional[Path] = None
+        self._since_keyframe = 0
+
+    def path_for(self, ts: datetime) -> Path:
+        return self.out_dir / f"indices_{ts.strftime('%Y%m%d')}.jsonl"
+
+    def write(self, snapshot: Dict[str, Dict], ts: Optional[datetime] = None) -> Optional[Dict]:
+        """Persist the change since the last snapshot; returns the written record or None if quiet."""
+        if not snapshot:
+            return None
+        ts = ts or datetime.utcnow()
+        path = self.path_for(ts)
+        keyframe = (
+            path != self._path
+            or (self.keyframe_every and self._since_keyframe >= self.keyframe_every)
+        )
+        if keyframe:
+            record = {"t": ts.isoformat(), "k": 1, "d": snapshot}
+            self._since_keyframe = 0
+        else:
+            delta = diff_snapshot(self._state, snapshot)
+            if not delta:
+                return None
+            record = {"t": ts.isoformat(), "d": delta}
+            self._since_keyframe += 1
+
+        from .storage import symbol_lock, ensure_dir, _append_bytes
+
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        ensure_dir(path)
+        with symbol_lock(self.out_dir, "indices"):
+            _append_bytes(path, line.encode("utf-8"))
+        self._path = path
+        self._state = {k: dict(v) for k, v in snapshot.items()}
+        return record
+
+
+def replay_deltas(path: str) -> Iterator[Tuple[str, Dict[str, Dict]]]:
+    """Yield (timestamp, full snapshot) for every record in a delta file."""
+    state: Dict[str, Dict] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if record.get("k"):
+                state = {k: dict(v) for k, v in record["d"].items()}
+            else:
+                for key, changed in record["d"].items():
+                    if changed is None:
+                        state.pop(key, None)
+                        continue
+                    row = state.setdefault(key, {})
+                    for field in changed.get(REMOVED_KEY, ()):
+                        row.pop(field, None)
+                    row.update({f: v for f, v in changed.items() if f != REMOVED_KEY})
+            yield record["t"], {k: dict(v) for k, v in state.items()}
+
+
+def poll_indices(
+    interval: float = 5.0,
+    out_dir: str = "data/realtime",
+    max_ticks: Optional[int] = None,
+    keyframe_every: Optional[int] = None,
+):
+    """Poll all indices every `interval` seconds and store change-only deltas.
+
+    Runs until interrupted, or for `max_ticks` polls.
+    """
+    writer = IndexDeltaWriter(out_dir=out_dir, keyframe_every=keyframe_every)
+    ticks = 0
+    while max_ticks is None or ticks < max_ticks:
+        started = time.monotonic()
+        snapshot, content = _fetch_index_payload()
+        record = writer.write(snapshot)
+        if record is not None:
+            # quiet ticks write nothing, not even to the raw archive
+            archive_response("realtime_index", REALTIME_API, "INDEX", {}, content)
+            print(f"{record['t']}: {'keyframe' if record.get('k') else 'delta'} ({len(record['d'])} indices)")
+        ticks += 1
+        if max_ticks is not None and ticks >= max_ticks:
+            break
+        time.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+
+def poll_symbols(
+    symbols: List[str],
+    interval: float = 5.0,
+    out_dir: str = "data/realtime",
+    bar_intervals: Iterable[int] = DEFAULT_INTERVALS,
+    max_ticks: Optional[int] = None,
+    aggregator: Optional[BarAggregator] = None,
+) -> BarAggregator:
+    """Poll each symbol every `interval` seconds, storing rows and finalized bars.
+
+    Bars for the running session can be queried from the returned (or passed)
+    aggregator with `aggregator.bars(symbol, seconds)`.
+    """
+    from .storage import append_realtime_row, append_bar_row, bar_path, last_csv_row, GroupCommitWriter
+
+    # rows and bars of one tick are committed together, one fsync per file
+    writer = GroupCommitWriter()
+
+    def save_bar(bar: Dict):
+        append_bar_row(bar["symbol"], bar["interval"], bar, out_dir=out_dir, writer=writer)
+
+    if aggregator is None:
+        aggregator = BarAggregator(intervals=bar_intervals, on_bar=save_bar)
+    # bars persisted by an earlier run stay final: don't open their intervals again
+    for sym in symbols:
+        for seconds in aggregator.intervals:
+            last = last_csv_row(bar_path(sym, interval_label(seconds), out_dir))
+            if last and last.get("start"):
+                aggregator.mark_final(sym, seconds, last["start"])
+    ticks = 0
+    try:
+        while max_ticks is None or ticks < max_ticks:
+            started = time.monotonic()
+            for sym in symbols:
+                row = fetch_realtime_price(sym)
+                row.pop("fundamentals", None)
+                if row.get("last") is None:
+                    continue
+                append_realtime_row(sym, row, out_dir=out_dir, writer=writer)
+                aggregator.update(sym, row["timestamp"], row["last"], cum_volume=row.get("volume"))
+            aggregator.flush()
+            ticks += 1
+            if max_ticks is not None and ticks >= max_ticks:
+                break
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+    finally:
+        # persist bars whose interval has ended; a bar still in progress is not complete
+        aggregator.flush()
+        writer.close()
+    return aggregator
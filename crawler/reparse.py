@@ -0,0 +1,173 @@
+"""Rebuild stored datasets from the raw-response archive (no network access).
+
+After changing column mapping or parsing heuristics, run `crawl.py reparse` to
+re-apply them to everything in the archive. Each symbol is parsed in its own
+worker process so the whole universe is rebuilt using all cores.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from . import archive
+
+
+FUNDAMENTAL_TYPES = ["overview", "ratios", "income", "balance", "cashflow"]
+WINDOW_DATASET = "historical/window"  # key for windowed API batches in `_select_batches`
+
+
+def _reparse_historical(symbol: str, batches: Dict[str, List[Dict]], root: str, out_dir: str) -> Optional[str]:
+    """Mirror `fetch_historical`: API pages first, then raw HTML, then rendered HTML."""
+    import pandas as pd
+    from bs4 import BeautifulSoup
+    from .cafef_parser import find_first_table_with_date
+    from .historical import parse_historical_rows, normalize_ohlc
+    from .storage import save_ohlc_csv
+
+    def api_rows(entries: List[Dict]) -> pd.DataFrame:
+        rows = []
+        for entry in entries:
+            data = archive.load_json(entry["sha256"], root)
+            rows.extend(data.get("Data", {}).get("Data", []) or [])
+        return parse_historical_rows(rows)
+
+    df = pd.DataFrame()
+    if batches.get("historical"):
+        df = api_rows(batches["historical"])
+    for dataset in ("historical_html", "historical_rendered"):
+        if not df.empty or not batches.get(dataset):
+            continue
+        html = archive.load_object(batches[dataset][-1]["sha256"], root).decode("utf-8", errors="replace")
+        df = find_first_table_with_date(BeautifulSoup(html, "html.parser"))
+    if not df.empty:
+        df = normalize_ohlc(df)
+
+    # repair windows fetched after the full history replace the rows of their dates, oldest first
+    for entries in _group_by_batch(batches.get(WINDOW_DATASET, [])):
+        window = api_rows(entries)
+        if window.empty:
+            continue
+        window = normalize_ohlc(window)
+        window = window[~window.index.duplicated(keep="last")]
+        if not df.empty:
+            df = pd.concat([df[~df.index.isin(window.index)], window]).sort_index()
+        else:
+            df = window
+
+    if df.empty:
+        return None
+    return str(save_ohlc_csv(symbol, df, out_dir=out_dir))
+
+
+def _reparse_fundamental(symbol: str, batches: Dict[str, List[Dict]], root: str, out_dir: str) -> Dict[str, str]:
+    from .fundamental import write_fundamental_csv
+
+    data = {}
+    for dtype in FUNDAMENTAL_TYPES:
+        entries = batches.get(f"fundamental/{dtype}")
+        if entries:
+            data[dtype] = archive.load_json(entries[-1]["sha256"], root)
+    if not data:
+        return {}
+    return write_fundamental_csv(symbol, data, out_dir=out_dir)
+
+
+def _is_window(entry: Dict) -> bool:
+    """True for historical API responses limited to a StartDate/EndDate window (e.g. `check --repair`)."""
+    params = entry.get("params") or {}
+    return entry["dataset"] == "historical" and bool(params.get("StartDate") or params.get("EndDate"))
+
+
+def _group_by_batch(entries: List[Dict]) -> List[List[Dict]]:
+    groups: List[List[Dict]] = []
+    for entry in entries:
+        if groups and groups[-1][0]["batch"] == entry["batch"]:
+            groups[-1].append(entry)
+        else:
+            groups.append([entry])
+    return groups
+
+
+def _select_batches(root: str) -> Dict[str, Dict[str, List[Dict]]]:
+    """Group the latest batches by symbol -> dataset.
+
+    Only the default fundamental variants (yearly, full history) are used, as
+    those are the ones `save_fundamental_csv` writes. Windowed historical
+    fetches do not replace the full history: the ones archived after the
+    latest full-range batch are kept, in order, under `WINDOW_DATASET`.
+    """
+    latest: Dict[Tuple[str, str], List[Dict]] = {}
+    windows: Dict[str, List[Dict]] = {}
+    for entry in archive.iter_index(root):
+        params = entry.get("params") or {}
+        if entry["dataset"].startswith("fundamental/") and params:
+            if params.get("yearly") != "1" or params.get("isAll") != "true":
+                continue
+        if _is_window(entry):
+            windows.setdefault(entry["symbol"], []).append(entry)
+            continue
+        key = (entry["symbol"], entry["dataset"])
+        current = latest.get(key)
+        if current is None or current[0]["batch"] != entry["batch"]:
+            latest[key] = [entry]
+            if entry["dataset"] == "historical":
+                # a new full history supersedes earlier repairs
+                windows.pop(entry["symbol"], None)
+        else:
+            current.append(entry)
+
+    by_symbol: Dict[str, Dict[str, List[Dict]]] = {}
+    for (symbol, dataset), entries in latest.items():
+        by_symbol.setdefault(symbol, {})[dataset] = entries
+    for symbol, entries in windows.items():
+        by_symbol.setdefault(symbol, {})[WINDOW_DATASET] = entries
+    return by_symbol
+
+
+def reparse_symbol(symbol: str, batches: Dict[str, List[Dict]], root: str, historical_out: str, fundamental_out: str) -> Dict:
+    """Rebuild every dataset for one symbol; returns a summary dict."""
+    result = {"symbol": symbol, "historical": None, "fundamental": {}, "error": None}
+    try:
+        if any(k.startswith("historical") for k in batches):
+            result["historical"] = _reparse_historical(symbol, batches, root, historical_out)
+        if any(k.startswith("fundamental/") for k in batches):
+            result["fundamental"] = _reparse_fundamental(symbol, batches, root, fundamental_out)
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+
+def reparse(
+    root: Optional[str] = None,
+    historical_out: str = "data/historical",
+    fundamental_out: str = "data/fundamental",
+    symbols: Optional[Iterable[str]] = None,
+    workers: Optional[int] = None,
+) -> List[Dict]:
+    """Rebuild historical and fundamental CSVs from the archive.
+
+    Args:
+        root: Archive root (defaults to `archive.ARCHIVE_DIR`)
+        historical_out: Output directory for OHLC CSVs
+        fundamental_out: Output directory for fundamental CSVs
+        symbols: Restrict to these symbols (default: everything archived)
+        workers: Number of worker processes (default: all cores)
+
+    Returns:
+        List of per-symbol summary dicts.
+    """
+    root = root if root is not None else archive.ARCHIVE_DIR
+    by_symbol = _select_batches(root)
+    if symbols is not None:
+        wanted = set(symbols)
+        by_symbol = {s: b for s, b in by_symbol.items() if s in wanted}
+    if not by_symbol:
+        return []
+
+    workers = workers or os.cpu_count() or 1
+    items = sorted(by_symbol.items())
+    if workers == 1 or len(items) == 1:
+        return [reparse_symbol(s, b, root, historical_out, fundamental_out) for s, b in items]
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(items))) as ex:
+        futures = [ex.submit(reparse_symbol, s, b, root, historical_out, fundamental_out) for s, b in items]
+        return [f.result() for f in futures]
@@ -0,0 +1,144 @@
+"""Latest-ratios snapshot and cross-sectional screener.
+
+`refresh_snapshot` materializes one row per symbol with the friendly fields of
+`get_latest_ratios` (plus exchange/industry from overview.csv) into
+`{fundamental_dir}/_latest_ratios.csv`. Refreshing is incremental: only
+symbols whose stored CSVs changed since the last refresh are re-read.
+
+`screen` evaluates a filter expression and sort order over that table in one
+vectorized pass, without any network calls:
+
+    screen("P/E < 10 and ROE > 15% and exchange == 'HOSE'", sort="-ROE")
+"""
+import re
+from pathlib import Path
+from typing import List, Optional
+
+import pandas as pd
+
+from .ratios import RATIO_FIELDS, friendly_ratios
+from .storage import atomic_write_csv
+
+
+SNAPSHOT_NAME = "_latest_ratios.csv"
+OVERVIEW_FIELDS = {"exchange": "exchange", "industry": "industryEn", "short_name": "shortName"}
+
+
+def _source_mtime(symbol_dir: Path) -> float:
+    mtimes = [p.stat().st_mtime for p in (symbol_dir / "ratios.csv", symbol_dir / "overview.csv") if p.exists()]
+    return max(mtimes) if mtimes else 0.0
+
+
+def _snapshot_row(symbol_dir: Path) -> Optional[dict]:
+    symbol = symbol_dir.name
+    ratios_path = symbol_dir / "ratios.csv"
+    if not ratios_path.exists():
+        return None
+    ratios = pd.read_csv(ratios_path)
+    if ratios.empty:
+        return None
+    # stored ratios are sorted oldest first; pick the latest period explicitly
+    if "year" in ratios.columns:
+        order = ["year", "quarter"] if "quarter" in ratios.columns else ["year"]
+        ratios = ratios.sort_values(order)
+    latest = ratios.iloc[-1].to_dict()
+    row = friendly_ratios(symbol, latest)
+
+    overview_path = symbol_dir / "overview.csv"
+    if overview_path.exists():
+        overview = pd.read_csv(overview_path)
+        if not overview.empty:
+            first = overview.iloc[0]
+            for name, field in OVERVIEW_FIELDS.items():
+                row[name] = first.get(field)
+    row["_source_mtime"] = _source_mtime(symbol_dir)
+    return row
+
+
+def load_snapshot(fundamental_dir: str = "data/fundamental") -> pd.DataFrame:
+    path = Path(fundamental_dir) / SNAPSHOT_NAME
+    if not path.exists():
+        return pd.DataFrame()
+    return pd.read_csv(path)
+
+
+def refresh_snapshot(fundamental_dir: str = "data/fundamental", full: bool = False) -> pd.DataFrame:
+    """Update the snapshot table from stored fundamentals and return it.
+
+    Args:
+        fundamental_dir: Directory written by `save_fundamental_csv`
+        full: Rebuild every row instead of only symbols whose files changed
+    """
+    base = Path(fundamental_dir)
+    snapshot = pd.DataFrame() if full else load_snapshot(fundamental_dir)
+    known = {}
+    if not snapshot.empty:
+        known = dict(zip(snapshot["symbol"].astype(str), snapshot["_source_mtime"]))
+
+    dirs = {p.name: p for p in base.iterdir() if p.is_dir() and not p.name.startswith(".")} if base.exists() else {}
+    changed = [d for sym, d in dirs.items() if sym not in known or _source_mtime(d) > known[sym]]
+    removed = set(known) - set(dirs)
+    if not changed and not removed and not snapshot.empty:
+        return snapshot
+
+    rows = [r for r in (_snapshot_row(d) for d in changed) if r is not None]
+    # symbols without ratios.csv have no row; they only matter if they used to
+    drop = ({d.name for d in changed} & set(known)) | removed
+    if not rows and not drop:
+        return snapshot
+    if drop:
+        snapshot = snapshot[~snapshot["symbol"].astype(str).isin(drop)]
+    if rows:
+        snapshot = pd.concat([snapshot, pd.DataFrame(rows)], ignore_index=True)
+    if snapshot.empty:
+        return snapshot
+    for col in RATIO_FIELDS:
+        if col in snapshot.columns:
+            snapshot[col] = pd.to_numeric(snapshot[col], errors="coerce")
+    snapshot = snapshot.sort_values("symbol").reset_index(drop=True)
+    atomic_write_csv(snapshot, base / SNAPSHOT_NAME, index=False)
+    return snapshot
+
+
+def _prepare_expr(expr: str, columns) -> str:
+    """Make friendly expressions valid for `DataFrame.query`.
+
+    - column names that are not identifiers (e.g. P/E) get backquoted
+    - percentages like `15%` become fractions (0.15), matching TCBS units
+    """
+    for col in sorted((c for c in columns if not str(c).isidentifier()), key=len, reverse=True):
+        expr = re.sub(rf"(?<!`){re.escape(col)}(?!`)", f"`{col}`", expr)
+    return re.sub(r"(\d+(?:\.\d+)?)\s*%", lambda m: repr(float(m.group(1)) / 100), expr)
+
+
+def screen(
+    expr: Optional[str] = None,
+    sort: Optional[str] = None,
+    limit: Optional[int] = None,
+    columns: Optional[List[str]] = None,
+    fundamental_dir: str = "data/fundamental",
+    refresh: bool = True,
+) -> pd.DataFrame:
+    """Filter and sort the latest-ratios snapshot.
+
+    Args:
+        expr: Filter expression, e.g. "P/E < 10 and ROE > 15% and exchange == 'HOSE'"
+        sort: Comma-separated columns; prefix with '-' for descending (e.g. "-ROE,P/E")
+        limit: Keep only the first N rows after sorting
+        columns: Columns to return (default: symbol plus all ratio fields)
+        fundamental_dir: Directory written by `save_fundamental_csv`
+        refresh: Refresh the snapshot from stored fundamentals first
+    """
+    df = refresh_snapshot(fundamental_dir) if refresh else load_snapshot(fundamental_dir)
+    if df.empty:
+        return df
+    if expr:
+        df = df.query(_prepare_expr(expr, df.columns))
+    if sort:
+        keys = [k.strip() for k in sort.split(",") if k.strip()]
+        by = [k.lstrip("-") for k in keys]
+        df = df.sort_values(by, ascending=[not k.startswith("-") for k in keys], na_position="last")
+    if limit:
+        df = df.head(limit)
+    cols = columns or (["symbol", "exchange", "year", "quarter"] + list(RATIO_FIELDS))
+    return df[[c for c in cols if c in df.columns]].reset_index(drop=True)
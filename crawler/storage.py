@@ -1,14 +1,180 @@
+"""CSV storage with atomic commits, per-symbol locking and group-commit appends.
+
+Several crawler processes (and readers) may share one data directory:
+
+- whole-file writes (`save_ohlc_csv`, `atomic_write_csv`) go to a temp file in
+  the same directory, are fsynced, then renamed over the target, so readers
+  always see either the old or the new complete file
+- every write to a symbol's files holds that symbol's lock
+  (`{out_dir}/.locks/{symbol}.lock`, an flock where available)
+- appends are rendered in memory and issued as a single O_APPEND write, so
+  rows from concurrent writers never interleave
+- `GroupCommitWriter` queues small appends from many threads and commits them
+  in batches: one write and one fsync per file per batch
+"""
+import os
+import queue
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
 import pandas as pd
 
+try:
+    import fcntl
+except ImportError:  # Windows: locks only serialize threads of one process
+    fcntl = None
+
+
+_thread_locks: Dict[str, threading.Lock] = {}
+_thread_locks_guard = threading.Lock()
+
 
 def ensure_dir(path: Path):
     path.parent.mkdir(parents=True, exist_ok=True)
 
 
+@contextmanager
+def symbol_lock(out_dir: str, symbol: str):
+    """Hold the exclusive lock for `symbol`'s files in `out_dir` (across threads and processes)."""
+    lock_path = Path(out_dir) / ".locks" / f"{symbol}.lock"
+    key = str(lock_path.resolve())
+    with _thread_locks_guard:
+        tlock = _thread_locks.setdefault(key, threading.Lock())
+    with tlock:
+        if fcntl is None:
+            yield
+            return
+        ensure_dir(lock_path)
+        fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+
+def _fsync_dir(path: Path):
+    if os.name != "posix":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _default_mode() -> int:
+    # mkstemp creates 0600 files; match what open() would have created instead
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+_DEFAULT_MODE = _default_mode()
+
+
+def atomic_write_bytes(path: Path, data: bytes, fsync: bool = True):
+    """Replace `path` with `data` via temp file + rename (callers hold the symbol lock).
+
+    The new file keeps the mode of the file it replaces, or gets the usual
+    umask-based mode, so other users sharing the data directory can read it.
+    """
+    path = Path(path)
+    ensure_dir(path)
+    try:
+        mode = path.stat().st_mode & 0o7777
+    except FileNotFoundError:
+        mode = _DEFAULT_MODE
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        if hasattr(os, "fchmod"):
+            os.fchmod(fd, mode)
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    if fsync:
+        _fsync_dir(path.parent)
+
+
+def atomic_write_csv(df: pd.DataFrame, path: Path, symbol: Optional[str] = None, **to_csv_kwargs) -> Path:
+    """Write `df` as CSV to `path` atomically, under `symbol`'s lock when given."""
+    path = Path(path)
+    data = df.to_csv(**to_csv_kwargs).encode("utf-8")
+    if symbol is None:
+        atomic_write_bytes(path, data)
+    else:
+        with symbol_lock(path.parent, symbol):
+            atomic_write_bytes(path, data)
+    return path
+
+
+def _append_bytes(path: Path, data: bytes, fsync: bool = False):
+    fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, data)
+        if fsync:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def append_csv_rows(path: Path, rows: List[dict], fsync: bool = False, **to_csv_kwargs) -> Path:
+    """Append rows to a CSV in one write, adding the header if the file is new or empty.
+
+    Callers hold the symbol lock, so the header check and the write are atomic
+    with respect to other writers.
+    """
+    path = Path(path)
+    ensure_dir(path)
+    header = not path.exists() or path.stat().st_size == 0
+    df = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame(rows)
+    text = df.to_csv(header=header, index=False, **to_csv_kwargs)
+    _append_bytes(path, text.encode("utf-8"), fsync=fsync)
+    return path
+
+
+def last_csv_row(path: Path, block: int = 4096) -> Optional[Dict[str, str]]:
+    """Return the last data row of a CSV as {column: text}, reading only the header and the tail."""
+    path = Path(path)
+    if not path.exists():
+        return None
+    with open(path, "rb") as f:
+        header = f.readline()
+        data_start = f.tell()
+        size = f.seek(0, os.SEEK_END)
+        if size <= data_start:
+            return None
+        pos, tail = size, b""
+        while pos > data_start and tail.rstrip(b"\r\n").count(b"\n") < 1:
+            pos = max(data_start, pos - block)
+            f.seek(pos)
+            tail = f.read(size - pos)
+    lines = [line for line in tail.splitlines() if line.strip()]
+    if not lines:
+        return None
+    names = header.decode("utf-8").rstrip("\r\n").split(",")
+    return dict(zip(names, lines[-1].decode("utf-8").split(",")))
+
+
 def save_ohlc_csv(symbol: str, df: pd.DataFrame, out_dir: str = "data/historical") -> Path:
     """Save historical OHLC DataFrame to CSV. Overwrites existing file for that symbol.
 
+    The file is replaced atomically under the symbol lock, so concurrent
+    readers never see a partially written file.
+
     Args:
         symbol: stock symbol string used for filename (safe to include exchange prefix)
         df: pandas DataFrame with a Date-like index or a `date` column
@@ -18,22 +184,132 @@ def save_ohlc_csv(symbol: str, df: pd.DataFrame, out_dir: str = "data/historical
         Path to saved CSV file
     """
     out = Path(out_dir) / f"{symbol}_ohlc.csv"
-    ensure_dir(out)
     if not df.index.name:
         if "date" in df.columns:
             df = df.set_index("date")
-    df.to_csv(out, index=True)
-    return out
+    return atomic_write_csv(df, out, symbol=symbol, index=True)
+
 
+def realtime_path(symbol: str, out_dir: str = "data/realtime") -> Path:
+    return Path(out_dir) / f"{symbol}_realtime.csv"
 
-def append_realtime_row(symbol: str, row: dict, out_dir: str = "data/realtime") -> Path:
+
+def bar_path(symbol: str, interval: str, out_dir: str = "data/realtime") -> Path:
+    return Path(out_dir) / f"{symbol}_bars_{interval}.csv"
+
+
+def append_realtime_row(symbol: str, row: dict, out_dir: str = "data/realtime", writer: "Optional[GroupCommitWriter]" = None) -> Path:
     """Append a single row (dict) for realtime data into CSV (creates file if missing).
 
     The row should contain a timestamp field (e.g., `timestamp`) and price fields.
+    With a `writer`, the row is queued for group commit instead of written now.
+    """
+    out = realtime_path(symbol, out_dir)
+    if writer is not None:
+        writer.append(symbol, out, row)
+        return out
+    with symbol_lock(out_dir, symbol):
+        return append_csv_rows(out, [row])
+
+
+def append_bar_row(symbol: str, interval: str, row: dict, out_dir: str = "data/realtime", writer: "Optional[GroupCommitWriter]" = None) -> Path:
+    """Append one finalized intraday bar to `{symbol}_bars_{interval}.csv` (creates file if missing)."""
+    out = bar_path(symbol, interval, out_dir)
+    if writer is not None:
+        writer.append(symbol, out, row)
+        return out
+    with symbol_lock(out_dir, symbol):
+        return append_csv_rows(out, [row])
+
+
+class GroupCommitWriter:
+    """Background writer that batches row appends into fewer writes and fsyncs.
+
+    `append` enqueues a row and returns a Future resolved once the batch
+    holding it is written (and fsynced, if enabled). Failed commits are
+    reported on stdout as well as set on the Futures. A batch is committed
+    every `flush_interval` seconds or as soon as `max_batch` rows are queued.
+
+    Use as a context manager, or call `close()` to commit what is left.
     """
-    out = Path(out_dir) / f"{symbol}_realtime.csv"
-    out.parent.mkdir(parents=True, exist_ok=True)
-    df = pd.DataFrame([row])
-    header = not out.exists()
-    df.to_csv(out, mode="a", header=header, index=False)
-    return out
+
+    def __init__(self, flush_interval: float = 0.05, max_batch: int = 1000, fsync: bool = True):
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.fsync = fsync
+        self._queue: "queue.Queue[Optional[Tuple[str, Path, dict, Future]]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="group-commit", daemon=True)
+        self._closed = False
+        self._thread.start()
+
+    def append(self, symbol: str, path: Path, row: dict) -> Future:
+        if self._closed:
+            raise RuntimeError("GroupCommitWriter is closed")
+        fut: Future = Future()
+        self._queue.put((symbol, Path(path), row, fut))
+        return fut
+
+    def flush(self):
+        """Block until everything queued so far is committed."""
+        fut: Future = Future()
+        self._queue.put(("", Path(), {}, fut))
+        fut.result()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run(self):
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            self._commit(batch)
+
+    def _commit(self, batch):
+        by_path: Dict[Path, List] = {}
+        markers = []
+        for symbol, path, row, fut in batch:
+            if not symbol:  # flush marker
+                markers.append(fut)
+                continue
+            by_path.setdefault(path, []).append((symbol, row, fut))
+        for path, items in by_path.items():
+            futs = [f for _, _, f in items]
+            try:
+                with symbol_lock(path.parent, items[0][0]):
+                    append_csv_rows(path, [r for _, r, _ in items], fsync=self.fsync)
+            except Exception as e:
+                # callers rarely wait on these futures, so make the loss visible
+                print(f"Group commit failed for {path} ({len(items)} rows): {e}")
+                for f in futs:
+                    f.set_exception(e)
+                continue
+            for f in futs:
+                f.set_result(path)
+        for f in markers:
+            f.set_result(None)
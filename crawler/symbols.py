@@ -5,8 +5,6 @@ looks for uppercase symbol-like tokens in tables. For reliable runs, pass a
 prepared `symbols.txt` file where each line is a symbol.
 """
 from typing import List
-import requests
-from bs4 import BeautifulSoup
 import re
 
 
@@ -20,6 +18,9 @@ def fetch_symbols_from_cafef(url: str) -> List[str]:
 
     This is heuristic — update `url` to the page listing components.
     """
+    import requests
+    from bs4 import BeautifulSoup
+
     r = requests.get(url, timeout=20)
     r.raise_for_status()
     soup = BeautifulSoup(r.text, "html.parser")